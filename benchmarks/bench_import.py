@@ -0,0 +1,77 @@
+"""Import time benchmark of the package and the command-line tool.
+
+Fails if importing gtfsutils pulls in the geospatial stack or if the import
+takes longer than the given limit.
+
+    python benchmarks/bench_import.py --repeat 5 --max-duration 0.3
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ['pandas', 'geopandas', 'shapely', 'pyproj']
+
+CHECK_MODULES = (
+    "import sys, json, gtfsutils; "
+    f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+)
+
+
+def measure(cmd, repeat):
+    durations = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        subprocess.run(cmd, check=True, capture_output=True)
+        durations.append(time.perf_counter() - t)
+
+    return min(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time benchmark")
+    parser.add_argument("-n", "--repeat", dest='repeat', type=int,
+        help="Number of runs (minimum is reported)", default=5)
+    parser.add_argument("--max-duration", dest='max_duration', type=float,
+        help="Maximum duration of 'import gtfsutils' in seconds",
+        default=None)
+    args = parser.parse_args()
+
+    output = subprocess.run(
+        [sys.executable, "-c", CHECK_MODULES],
+        check=True, capture_output=True, text=True).stdout
+    loaded = json.loads(output)
+
+    baseline = measure([sys.executable, "-c", "pass"], args.repeat)
+    results = {
+        'import gtfsutils': measure(
+            [sys.executable, "-c", "import gtfsutils"], args.repeat),
+        'gtfsutils version': measure(
+            [sys.executable, "-m", "gtfsutils", "version"], args.repeat),
+        'import gtfsutils.filter': measure(
+            [sys.executable, "-c", "import gtfsutils.filter"], args.repeat),
+    }
+
+    print(f"{'interpreter startup':<28s} {baseline:8.3f}s")
+    for name, duration in results.items():
+        print(f"{name:<28s} {duration:8.3f}s "
+              f"(+{duration - baseline:.3f}s)")
+
+    failed = False
+    if loaded:
+        print(f"\n'import gtfsutils' loads {', '.join(loaded)}")
+        failed = True
+
+    duration = results['import gtfsutils'] - baseline
+    if args.max_duration is not None and duration > args.max_duration:
+        print(f"\n'import gtfsutils' took {duration:.3f}s, "
+              f"limit is {args.max_duration:.3f}s")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,14 +5,13 @@ import os
 import re
 from zipfile import ZipFile
 
-import geopandas as gpd
-import pandas as pd
-import shapely.geometry
-
 __version__ = "0.0.5"
 
 logger = logging.getLogger(__name__)
 
+# pandas, geopandas and shapely are imported where they are needed, so that
+# importing the package and the command-line tool start up fast
+
 
 REQUIRED_GTFS_FILES = [
     'agency',
@@ -58,12 +57,22 @@ ROUTE_TYPE_MAP = {
     7: 'funicular'
 }
 
+WEEKDAYS = [
+    'monday',
+    'tuesday',
+    'wednesday',
+    'thursday',
+    'friday',
+    'saturday',
+    'sunday'
+]
+
 COLUMNS_DEPENDENCY_DICT = {
-    'agency':   ('agency_id',  ['routes']),
+    'agency':   ('agency_id',  ['routes', 'fare_attributes']),
     'routes':   ('route_id',   ['trips']),
     'trips':    ('trip_id',    ['stop_times']),
     'stops':    ('stop_id',    ['stop_times']),
-    'calendar': ('service_id', ['calendar_dates']),
+    'calendar': ('service_id', ['trips', 'calendar_dates']),
     'shapes':   ('shape_id',   ['trips'])
 }
 
@@ -74,6 +83,8 @@ def replace_line_breaks_in_quotes(text: str) -> io.StringIO:
 
 
 def load_gtfs(filepath, subset=None):
+    import pandas as pd
+
     df_dict = {}
     buffer: io.StringIO
 
@@ -110,7 +121,26 @@ def load_gtfs(filepath, subset=None):
     return df_dict
 
 
+def time_to_seconds(times):
+    # Parses HH:MM:SS times (hours can exceed 24) into integer seconds,
+    # missing or invalid times are -1. Only the unique values are parsed.
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(pd.Series(times), sort=False)
+    parts = pd.Series(uniques, dtype=str).str.strip().str.extract(
+        r'^(\d+):(\d\d):(\d\d)$')
+    parts = parts.apply(pd.to_numeric, errors='coerce')
+    seconds = parts[0] * 3600 + parts[1] * 60 + parts[2]
+    seconds = seconds.fillna(-1).values.astype(np.int64)
+
+    # Missing values have code -1, which picks the appended -1
+    return np.append(seconds, -1)[codes]
+
+
 def load_stops(src):
+    import geopandas as gpd
+
     if isinstance(src, str):
         df_dict = load_gtfs(src, subset=['stops'])
     elif isinstance(src, dict):
@@ -127,6 +157,11 @@ def load_stops(src):
 
 
 def load_shapes(src, geom_type='linestring'):
+    import geopandas as gpd
+    import numpy as np
+    import pandas as pd
+    import shapely
+
     if isinstance(src, str):
         df_dict = load_gtfs(src, subset=['shapes'])
     elif isinstance(src, dict):
@@ -139,18 +174,22 @@ def load_shapes(src, geom_type='linestring'):
         raise ValueError("shapes.txt not found in GTFS")
 
     if geom_type == 'linestring':
-        items = []
-        for shape_id, g in df_dict['shapes'].groupby('shape_id'):
-            g = g.sort_values('shape_pt_sequence')
-            coords = g[['shape_pt_lon', 'shape_pt_lat']].values
-
-            if len(coords) > 1:
-                items.append({
-                    'shape_id': shape_id,
-                    'geom': shapely.geometry.LineString(coords)
-                })
-
-        gdf = gpd.GeoDataFrame(items, geometry='geom', crs="EPSG:4326")  # type: ignore[reportCallIssue]
+        shapes = df_dict['shapes'].sort_values(
+            ['shape_id', 'shape_pt_sequence'])
+        shape_ids, counts = np.unique(
+            shapes['shape_id'].values, return_counts=True)
+        mask = np.repeat(counts > 1, counts)
+        shapes = shapes[mask]
+
+        # Build all lines at once from the sorted points
+        indices, shape_ids = pd.factorize(shapes['shape_id'], sort=True)
+        geoms = shapely.linestrings(
+            shapes[['shape_pt_lon', 'shape_pt_lat']].values,
+            indices=indices)
+
+        gdf = gpd.GeoDataFrame(
+            {'shape_id': shape_ids, 'geom': geoms},
+            geometry='geom', crs="EPSG:4326")  # type: ignore[reportCallIssue]
 
     elif geom_type == 'point':
         shapes = df_dict['shapes'].copy()
@@ -2,10 +2,8 @@ import json
 import time
 import logging
 import argparse
-import geopandas as gpd
 
 import gtfsutils
-import gtfsutils.filter
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +39,77 @@ def main():
     parser_info = subparsers.add_parser("info", help="Info method")
     parser_info.add_argument(dest="src", help="Input GTFS filepath")
 
+    # Validate method
+    parser_validate = subparsers.add_parser("validate",
+        help="Validate method")
+    parser_validate.add_argument(dest="src", help="Input GTFS filepath")
+    parser_validate.add_argument("-n", "--num-samples", dest='num_samples',
+        type=int, help="Number of sample rows per failed check", default=5)
+    parser_validate.add_argument("--json", action='store_true',
+        dest='json', help="Print report as JSON")
+
+    # Export method
+    parser_export = subparsers.add_parser("export",
+        help="Export to GeoParquet or FlatGeobuf")
+    parser_export.add_argument(dest="src", help="Input GTFS filepath")
+    parser_export.add_argument(dest="dst", help="Output directory")
+    parser_export.add_argument("-l", "--layers", dest='layers', nargs='*',
+        help="Layers to export (stops, shapes, routes)",
+        default=['stops', 'shapes', 'routes'])
+    parser_export.add_argument("-f", "--format", dest='format',
+        help="Output format of layers (parquet, flatgeobuf)",
+        default="parquet")
+    parser_export.add_argument("--no-tables", action='store_false',
+        dest='tables', help="Do not export the GTFS tables")
+    parser_export.add_argument("--overwrite", action='store_true',
+        dest='overwrite', help="Overwrite if exists")
+    parser_export.add_argument('-v', '--verbose', action='store_true',
+        dest='verbose', default=False,
+        help="Verbose output")
+
+    # Batch method
+    parser_batch = subparsers.add_parser("batch",
+        help="Filter many GTFS files in parallel")
+    parser_batch.add_argument(dest="manifest",
+        help="Manifest filepath (CSV or JSON with src, dst, bounds "
+             "and optionally target and operation)")
+    parser_batch.add_argument("-j", "--jobs", dest='jobs', type=int,
+        help="Number of parallel jobs (default: number of CPUs)",
+        default=None)
+    parser_batch.add_argument("-m", "--max-memory", dest='max_memory',
+        type=float, help="Memory budget of parallel jobs in MB",
+        default=None)
+    parser_batch.add_argument("--memory-factor", dest='memory_factor',
+        type=float, help="Estimated memory usage per byte of input file",
+        default=10.0)
+    parser_batch.add_argument("-r", "--report", dest='report',
+        help="Report filepath (CSV or JSON)", default=None)
+    parser_batch.add_argument("--overwrite", action='store_true',
+        dest='overwrite', help="Overwrite if exists")
+    parser_batch.add_argument('-v', '--verbose', action='store_true',
+        dest='verbose', default=False,
+        help="Verbose output")
+
+    # Serve method
+    parser_serve = subparsers.add_parser("serve",
+        help="Serve GTFS feeds from memory over HTTP")
+    parser_serve.add_argument("--host", dest='host',
+        help="Host to bind to", default="127.0.0.1")
+    parser_serve.add_argument("-p", "--port", dest='port', type=int,
+        help="Port to bind to", default=8000)
+    parser_serve.add_argument("-s", "--socket", dest='socket',
+        help="Unix socket path (instead of host and port)", default=None)
+    parser_serve.add_argument("-m", "--max-memory", dest='max_memory',
+        type=float, help="Memory limit of cached feeds in MB",
+        default=2048)
+    parser_serve.add_argument("-w", "--workers", dest='workers', type=int,
+        help="Number of workers for filter requests", default=4)
+    parser_serve.add_argument("--preload", dest='preload', nargs='*',
+        help="GTFS filepaths to load on startup", default=[])
+    parser_serve.add_argument('-v', '--verbose', action='store_true',
+        dest='verbose', default=False,
+        help="Verbose output")
+
     # Version method
     subparsers.add_parser("version", help="Print version")
 
@@ -58,15 +127,18 @@ def main():
         print(f"{gtfsutils.__name__} {gtfsutils.__version__}")
 
     elif args.method == "filter":
+        from gtfsutils.filter import (
+            load_filter_geometry,
+            spatial_filter_by_stops,
+            spatial_filter_by_shapes
+        )
+
         assert args.bounds is not None, "No bounds defined"
         assert args.src is not None, "No input file specified"
         assert args.dst is not None, "No output file specified"
 
         # Prepare bounds
-        if args.bounds.startswith("["):
-            bounds = json.loads(args.bounds)
-        else:
-            bounds = gpd.read_file(args.bounds).geometry.unary_union
+        bounds = load_filter_geometry(args.bounds)
 
         # Load GTFS
         t = time.time()
@@ -77,11 +149,11 @@ def main():
         # Filter GTFS
         if args.target == 'stops':
             t = time.time()
-            gtfsutils.filter.spatial_filter_by_stops(
+            spatial_filter_by_stops(
                 df_dict, bounds)
         elif args.target == 'shapes':
             t = time.time()
-            gtfsutils.filter.spatial_filter_by_shapes(
+            spatial_filter_by_shapes(
                 df_dict, bounds, operation=args.operation)
         else:
             raise ValueError(
@@ -105,6 +177,71 @@ def main():
         assert args.src is not None, "No input file specified"
         gtfsutils.print_info(args.src)
 
+    elif args.method == "validate":
+        from gtfsutils.validate import print_report, validate_gtfs
+
+        assert args.src is not None, "No input file specified"
+        report = validate_gtfs(args.src, num_samples=args.num_samples)
+        if args.json:
+            print(json.dumps(report, indent=2, default=str))
+        else:
+            print_report(report)
+
+        if not report['valid']:
+            raise SystemExit(1)
+
+    elif args.method == "export":
+        from gtfsutils.export import export_gtfs
+
+        assert args.src is not None, "No input file specified"
+        assert args.dst is not None, "No output directory specified"
+
+        t = time.time()
+        export_gtfs(
+            args.src, args.dst,
+            layers=args.layers,
+            tables=args.tables,
+            driver=args.format,
+            overwrite=args.overwrite)
+        duration = time.time() - t
+        logger.debug(f"Exported {args.src} in {duration:.2f}s")
+
+    elif args.method == "batch":
+        from gtfsutils.batch import load_manifest, run_batch, save_report
+
+        jobs = load_manifest(args.manifest)
+
+        t = time.time()
+        df_report = run_batch(
+            jobs,
+            max_workers=args.jobs,
+            max_memory=None if args.max_memory is None
+            else args.max_memory * 2**20,
+            memory_factor=args.memory_factor,
+            overwrite=args.overwrite)
+        duration = time.time() - t
+
+        num_failed = (df_report['status'] == 'failed').sum()
+        num_skipped = (df_report['status'] == 'skipped').sum()
+        logger.info(f"Processed {len(df_report)} feeds in {duration:.2f}s "
+                    f"({num_failed} failed, {num_skipped} skipped)")
+        if args.report is not None:
+            save_report(df_report, args.report)
+
+        if num_failed:
+            raise SystemExit(1)
+
+    elif args.method == "serve":
+        from gtfsutils.serve import serve
+
+        serve(
+            host=args.host,
+            port=args.port,
+            socket_path=args.socket,
+            max_memory=int(args.max_memory * 2**20),
+            workers=args.workers,
+            preload=args.preload)
+
     elif args.method == "merge":
         raise NotImplementedError("Merge not implemented")
 
@@ -0,0 +1,177 @@
+import csv
+import json
+import logging
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from . import load_gtfs, save_gtfs
+from .filter import (
+    load_filter_geometry,
+    spatial_filter_by_stops,
+    spatial_filter_by_shapes
+)
+
+logger = logging.getLogger(__name__)
+
+
+def load_manifest(filepath):
+    if filepath.endswith('.json'):
+        with open(filepath) as f:
+            jobs = json.load(f)
+    else:
+        with open(filepath, newline='') as f:
+            jobs = list(csv.DictReader(f))
+
+    for i, job in enumerate(jobs):
+        for key in ['src', 'dst', 'bounds']:
+            if not job.get(key):
+                raise ValueError(f"Job {i} in {filepath} has no {key}")
+        if isinstance(job['bounds'], list):
+            job['bounds'] = json.dumps(job['bounds'])
+        job['target'] = job.get('target') or 'stops'
+        job['operation'] = job.get('operation') or 'within'
+
+    return jobs
+
+
+def get_feed_size(filepath):
+    if os.path.isdir(filepath):
+        return sum(
+            os.path.getsize(os.path.join(filepath, filename))
+            for filename in os.listdir(filepath))
+
+    return os.path.getsize(filepath)
+
+
+def run_job(job, overwrite=False):
+    result = {'src': job['src'], 'dst': job['dst']}
+    if os.path.exists(job['dst']) and not overwrite:
+        result['status'] = 'skipped'
+        result['error'] = f"{job['dst']} already exists"
+        return result
+
+    t_start = time.time()
+    try:
+        t = time.time()
+        df_dict = load_gtfs(job['src'])
+        result['load_duration'] = time.time() - t
+
+        t = time.time()
+        filter_geometry = load_filter_geometry(job['bounds'])
+        if job['target'] == 'stops':
+            spatial_filter_by_stops(df_dict, filter_geometry)
+        elif job['target'] == 'shapes':
+            spatial_filter_by_shapes(
+                df_dict, filter_geometry, operation=job['operation'])
+        else:
+            raise ValueError(
+                f"Target {job['target']} not supported!")
+        result['filter_duration'] = time.time() - t
+
+        t = time.time()
+        save_gtfs(df_dict, job['dst'], ignore_required=True,
+                  overwrite=overwrite)
+        result['save_duration'] = time.time() - t
+
+        result['status'] = 'ok'
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = f"[{e.__class__.__name__}] {e}"
+        logger.debug(traceback.format_exc())
+
+    result['duration'] = time.time() - t_start
+
+    return result
+
+
+def run_batch(jobs, max_workers=None, max_memory=None, memory_factor=10.0,
+              overwrite=False):
+    # Largest feeds first, so that a huge feed does not run alone at the end
+    pending = []
+    for job in jobs:
+        try:
+            size = get_feed_size(job['src'])
+        except OSError:
+            size = 0
+        pending.append((size, job))
+    pending.sort(key=lambda item: item[0], reverse=True)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    results = []
+    running = {}
+    memory_usage = 0
+    num_jobs = len(pending)
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    try:
+        while pending or running:
+            # Start the largest pending jobs that fit into the memory budget,
+            # a job always starts if nothing else is running
+            i = 0
+            while i < len(pending) and len(running) < max_workers:
+                size, job = pending[i]
+                estimate = size * memory_factor
+                if max_memory is None or not running \
+                   or memory_usage + estimate <= max_memory:
+                    future = executor.submit(run_job, job, overwrite)
+                    running[future] = (size, job, estimate, executor)
+                    memory_usage += estimate
+                    pending.pop(i)
+                else:
+                    i += 1
+
+            broken = False
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                size, job, estimate, pool = running.pop(future)
+                memory_usage -= estimate
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    broken = broken or pool is executor
+                    result = {
+                        'src': job['src'],
+                        'dst': job['dst'],
+                        'status': 'failed',
+                        'error': f"[{e.__class__.__name__}] {e}"
+                    }
+                result['size'] = size
+                results.append(result)
+
+                message = f"[{len(results)}/{num_jobs}] {job['src']} " \
+                    f"{result['status']}"
+                if 'duration' in result:
+                    message += f" in {result['duration']:.2f}s"
+                if result['status'] == 'ok':
+                    logger.info(message)
+                elif result['status'] == 'skipped':
+                    logger.warning(f"{message}: {result['error']}")
+                else:
+                    logger.error(f"{message}: {result['error']}")
+
+            # A crashed worker (e.g. killed by the OOM killer) breaks the
+            # whole pool, the remaining jobs continue in a new one
+            if broken:
+                executor.shutdown(wait=False)
+                executor = ProcessPoolExecutor(max_workers=max_workers)
+    finally:
+        executor.shutdown()
+
+    columns = [
+        'src', 'dst', 'size', 'status', 'error', 'duration',
+        'load_duration', 'filter_duration', 'save_duration'
+    ]
+
+    return pd.DataFrame(results, columns=columns)
+
+
+def save_report(df_report, filepath):
+    if filepath.endswith('.json'):
+        df_report.to_json(filepath, orient='records', indent=2)
+    else:
+        df_report.to_csv(filepath, index=False)
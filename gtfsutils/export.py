@@ -0,0 +1,122 @@
+import logging
+import os
+import time
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from . import load_gtfs, load_shapes, load_stops
+from .routes import load_routes_counts
+
+logger = logging.getLogger(__name__)
+
+LAYERS = ['stops', 'shapes', 'routes']
+
+DRIVERS = {
+    'parquet': '.parquet',
+    'flatgeobuf': '.fgb'
+}
+
+
+def load_layer(df_dict, layer):
+    if layer == 'stops':
+        gdf = load_stops(df_dict)
+    elif layer == 'shapes':
+        gdf = load_shapes(df_dict)
+    elif layer == 'routes':
+        gdf = load_routes_counts(df_dict)
+    else:
+        raise ValueError(
+            f"Layer {layer} not supported!")
+
+    # Sort along a Hilbert curve, so that nearby features end up in the
+    # same row groups. The bounding box columns let readers skip the row
+    # groups outside of a requested window.
+    geoms = np.asarray(gdf.geometry.values)
+    gdf = gdf[shapely.is_geometry(geoms) & ~shapely.is_empty(geoms)]
+    if len(gdf) > 0:
+        gdf = gdf.iloc[gdf.geometry.hilbert_distance().argsort()]
+    bounds = gdf.geometry.bounds
+
+    return gdf.assign(
+        xmin=bounds['minx'].values,
+        ymin=bounds['miny'].values,
+        xmax=bounds['maxx'].values,
+        ymax=bounds['maxy'].values
+    ).reset_index(drop=True)
+
+
+def export_gtfs(src, dst, layers=LAYERS, tables=True, driver='parquet',
+                row_group_size=50000, overwrite=False):
+    if driver not in DRIVERS:
+        raise ValueError(
+            f"Driver {driver} not supported!")
+
+    # Fail before loading the feed if Parquet can't be written
+    if driver == 'parquet' or tables:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "Writing Parquet requires pyarrow, install it with "
+                "'pip install gtfsutils[export]'") from None
+
+    if isinstance(src, str):
+        df_dict = load_gtfs(src)
+    elif isinstance(src, dict):
+        df_dict = src
+    else:
+        raise ValueError(
+            f"Data type not supported: {type(src)}")
+
+    os.makedirs(dst, exist_ok=True)
+
+    for layer in layers:
+        filepath = os.path.join(dst, layer + DRIVERS[driver])
+        if os.path.exists(filepath) and not overwrite:
+            logger.warning(f"Skipping {filepath}, already exists")
+            continue
+        if layer == 'shapes' and 'shapes' not in df_dict:
+            logger.warning("Skipping shapes, shapes.txt not found")
+            continue
+
+        t = time.time()
+        gdf = load_layer(df_dict, layer)
+        if driver == 'parquet':
+            gdf.to_parquet(filepath, index=False,
+                           row_group_size=row_group_size)
+        else:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            gdf.to_file(filepath, driver='FlatGeobuf', SPATIAL_INDEX='YES')
+        logger.debug(
+            f"Exported {layer} to {filepath} in {time.time() - t:.2f}s")
+
+    # Raw tables, without geometry
+    if tables:
+        os.makedirs(os.path.join(dst, 'tables'), exist_ok=True)
+        for key, df in df_dict.items():
+            filepath = os.path.join(dst, 'tables', key + '.parquet')
+            if os.path.exists(filepath) and not overwrite:
+                logger.warning(f"Skipping {filepath}, already exists")
+                continue
+            df.to_parquet(filepath, index=False,
+                          row_group_size=row_group_size)
+
+
+def read_layer(filepath, bbox=None, columns=None):
+    if filepath.endswith(DRIVERS['flatgeobuf']):
+        return gpd.read_file(filepath, bbox=bbox)
+
+    filters = None
+    if bbox is not None:
+        xmin, ymin, xmax, ymax = bbox
+        filters = [
+            ('xmax', '>=', xmin),
+            ('xmin', '<=', xmax),
+            ('ymax', '>=', ymin),
+            ('ymin', '<=', ymax)
+        ]
+
+    return gpd.read_parquet(filepath, columns=columns, filters=filters)
@@ -1,9 +1,19 @@
+import json
+
+import geopandas as gpd
 import numpy as np
 import shapely
 
 from . import load_shapes, load_stops
 
 
+def load_filter_geometry(bounds):
+    if bounds.startswith("["):
+        return json.loads(bounds)
+
+    return gpd.read_file(bounds).geometry.unary_union
+
+
 def spatial_filter_by_stops(df_dict, filter_geometry):
     if isinstance(filter_geometry, list) or \
        isinstance(filter_geometry, np.ndarray):
@@ -1,3 +1,6 @@
+import difflib
+
+import numpy as np
 import pandas as pd
 from collections import defaultdict
 from . import (
@@ -6,34 +9,207 @@ from . import (
     AVAILABLE_GTFS_FILES
 )
 
+# References to stop ids besides stop_times.txt
+STOP_ID_COLUMNS = [
+    ('stops',     'parent_station'),
+    ('transfers', 'from_stop_id'),
+    ('transfers', 'to_stop_id'),
+    ('pathways',  'from_stop_id'),
+    ('pathways',  'to_stop_id'),
+]
+
+AGENCY_KEY_COLUMNS = ['agency_name', 'agency_url', 'agency_timezone']
+
+# Primary key of transfers.txt, the route and trip ids are optional
+TRANSFER_KEY_COLUMNS = [
+    'from_stop_id', 'to_stop_id',
+    'from_route_id', 'to_route_id',
+    'from_trip_id', 'to_trip_id'
+]
+
+
+def _normalize_names(names):
+    return names.fillna('').astype(str).str.lower() \
+        .str.replace(r'[\W_]+', ' ', regex=True).str.strip().values
+
+
+def _connected_components(n, i, j):
+    # Label propagation, every node ends up with the smallest index of
+    # its component
+    labels = np.arange(n)
+    while True:
+        min_labels = np.minimum(labels[i], labels[j])
+        new_labels = labels.copy()
+        np.minimum.at(new_labels, i, min_labels)
+        np.minimum.at(new_labels, j, min_labels)
+        new_labels = new_labels[new_labels]
+        if np.array_equal(new_labels, labels):
+            return labels
+        labels = new_labels
+
+
+def _replace_ids(values, ids, new_ids):
+    idx = pd.Index(ids).get_indexer(values)
+    replaced = np.where(idx >= 0, new_ids[idx], values)
+
+    return pd.Series(replaced, index=values.index).astype(values.dtype)
+
+
+def deduplicate_stops(df_dict, feed_index, max_distance=20.0,
+                      min_name_similarity=0.8):
+    from .spatial import project_lonlat, query_pairs
+
+    stops = df_dict['stops']
+    x, y = project_lonlat(stops['stop_lon'].values, stops['stop_lat'].values)
+    i, j = query_pairs(x, y, max_distance)
+
+    # Only stops of different feeds with the same location type
+    mask = feed_index[i] != feed_index[j]
+    if 'location_type' in stops:
+        location_type = stops['location_type'].fillna(0).values
+        mask &= location_type[i] == location_type[j]
+    i, j = i[mask], j[mask]
+
+    # Compare names, similarity is only computed for the nearby candidates
+    names = _normalize_names(stops['stop_name'])
+    similarity = (names[i] == names[j]).astype(float)
+    for k in np.flatnonzero(similarity < 1) \
+            if min_name_similarity < 1 else []:
+        similarity[k] = difflib.SequenceMatcher(
+            None, names[i[k]], names[j[k]]).ratio()
+    mask = similarity >= min_name_similarity
+    i, j, similarity = i[mask], j[mask], similarity[mask]
+
+    if len(i) == 0:
+        return 0
+
+    # Keep the best match of each stop in every other feed (most similar
+    # name, then closest), and only pairs that are each other's best match.
+    # Otherwise two different stops of one feed can end up merged.
+    distance = np.hypot(x[i] - x[j], y[i] - y[j])
+    pairs = pd.DataFrame({
+        'a': np.concatenate([i, j]),
+        'b': np.concatenate([j, i]),
+        'similarity': np.concatenate([similarity, similarity]),
+        'distance': np.concatenate([distance, distance])
+    })
+    pairs['feed'] = feed_index[pairs['b'].values]
+    pairs = pairs \
+        .sort_values(['similarity', 'distance'], ascending=[False, True]) \
+        .drop_duplicates(subset=['a', 'feed'])
+    a, b = pairs['a'].values, pairs['b'].values
+    n = len(stops)
+    mask = (a < b) & np.isin(a * n + b, b * n + a)
+    i, j = a[mask], b[mask]
+
+    labels = _connected_components(len(stops), i, j)
+    stop_ids = stops['stop_id'].values
+    canonical_ids = stop_ids[labels]
+
+    for key, col in [('stop_times', 'stop_id')] + STOP_ID_COLUMNS:
+        if key in df_dict and col in df_dict[key]:
+            df_dict[key][col] = _replace_ids(
+                df_dict[key][col], stop_ids, canonical_ids)
 
-def merge_gtfs(src):
+    mask = labels == np.arange(len(stops))
+    df_dict['stops'] = df_dict['stops'][mask]
+    # Shared stops can turn transfers and pathways of different feeds into
+    # duplicates that only differ in their attributes
+    if 'transfers' in df_dict:
+        df = df_dict['transfers']
+        subset = [col for col in TRANSFER_KEY_COLUMNS if col in df]
+        df_dict['transfers'] = df.drop_duplicates(subset=subset)
+    if 'pathways' in df_dict and 'pathway_id' in df_dict['pathways']:
+        df_dict['pathways'] = df_dict['pathways'] \
+            .drop_duplicates(subset=['pathway_id'])
+
+    return int((~mask).sum())
+
+
+def deduplicate_agencies(df_dict):
+    agency = df_dict['agency']
+    columns = [col for col in AGENCY_KEY_COLUMNS if col in agency]
+    if not columns:
+        return 0
+
+    canonical_ids = agency.groupby(columns, dropna=False, sort=False)[
+        'agency_id'].transform('first').values
+    agency_ids = agency['agency_id'].values
+
+    for key in ['routes', 'fare_attributes']:
+        if key in df_dict and 'agency_id' in df_dict[key]:
+            df_dict[key]['agency_id'] = _replace_ids(
+                df_dict[key]['agency_id'], agency_ids, canonical_ids)
+
+    mask = canonical_ids == agency_ids
+    df_dict['agency'] = agency[mask]
+
+    return int((~mask).sum())
+
+
+def merge_gtfs(src, deduplicate=False, max_stop_distance=20.0,
+               min_name_similarity=0.8):
     gtfs_list = []
     if all(isinstance(elem, str) for elem in src):
         for filepath in src:
             gtfs_list.append(load_gtfs(filepath))
-    elif all(isinstance(elem, list) for elem in src):
+    elif all(isinstance(elem, dict) for elem in src):
         gtfs_list = src
     else:
         raise ValueError(
             f"Data type not supported: {type(src)}")
 
+    # Optional references (e.g. trips.shape_id) can be missing, only ids
+    # that are lost by the renumbering are an error
+    num_missing_dict = defaultdict(int)
+    for df_dict in gtfs_list:
+        for col, (id_col, deps) in COLUMNS_DEPENDENCY_DICT.items():
+            for dep in deps:
+                if dep not in df_dict:
+                    continue
+                if id_col in df_dict[dep]:
+                    num_missing_dict[dep, id_col] += \
+                        df_dict[dep][id_col].isna().sum()
+                else:
+                    num_missing_dict[dep, id_col] += len(df_dict[dep])
+
     id_offset_dict = defaultdict(int)
     col_map_dict = {}
 
     # Assign new ids
     for df_dict in gtfs_list:
         for col, (id_col, deps) in COLUMNS_DEPENDENCY_DICT.items():
-            col_map_dict[col] = {v: i + id_offset_dict[col] for i, v in enumerate(
-                df_dict[col][id_col].values)}
-            df_dict[col][id_col] = df_dict[col][id_col] \
-                .apply(col_map_dict[col].get)
-            
+            if col == 'calendar':
+                # Services can be defined in calendar.txt, calendar_dates.txt
+                # or both, ids of both files need new numbers
+                keys = [key for key in ['calendar', 'calendar_dates']
+                        if key in df_dict]
+                if not keys:
+                    continue
+                ids = pd.unique(pd.concat(
+                    [df_dict[key][id_col] for key in keys]).dropna())
+            elif col in df_dict:
+                ids = df_dict[col][id_col].values
+            else:
+                continue
+
+            col_map_dict[col] = {v: i + id_offset_dict[col]
+                                 for i, v in enumerate(ids)}
+            if col in df_dict:
+                df_dict[col][id_col] = df_dict[col][id_col] \
+                    .apply(col_map_dict[col].get)
+
             id_offset_dict[col] += len(col_map_dict[col])
 
             for dep in deps:
-                df_dict[dep][id_col] = df_dict[dep][id_col] \
-                    .apply(col_map_dict[col].get)
+                if dep in df_dict and id_col in df_dict[dep]:
+                    df_dict[dep][id_col] = df_dict[dep][id_col] \
+                        .apply(col_map_dict[col].get)
+
+        for key, col in STOP_ID_COLUMNS:
+            if key in df_dict and col in df_dict[key]:
+                df_dict[key][col] = df_dict[key][col] \
+                    .map(col_map_dict['stops'])
 
     # Merge dataframes
     df_dict_combined = {}
@@ -42,18 +218,35 @@ def merge_gtfs(src):
             df_list = [df_dict[key] for df_dict in gtfs_list if key in df_dict]
             df_dict_combined[key] = pd.concat(df_list)
 
+    # Collapse stops and agencies that are shared between feeds
+    if deduplicate:
+        feed_index = np.repeat(
+            np.arange(len(gtfs_list)),
+            [len(df_dict['stops']) for df_dict in gtfs_list])
+        deduplicate_stops(
+            df_dict_combined, feed_index,
+            max_distance=max_stop_distance,
+            min_name_similarity=min_name_similarity)
+        deduplicate_agencies(df_dict_combined)
+
     # Validate id columns (TODO: move to test)
     for col, (id_col, deps) in COLUMNS_DEPENDENCY_DICT.items():
-        assert df_dict_combined[col][id_col].isna().sum() == 0, \
-            f"has NaN for {col} {id_col}"
-        if col != 'shapes':
-            assert df_dict_combined[col][id_col].is_unique, \
-                f"not unique for {col} {id_col}"
-            assert df_dict_combined[col][id_col].is_monotonic, \
-                f"not monotonic for {col} {id_col}"
+        if col in df_dict_combined:
+            assert df_dict_combined[col][id_col].isna().sum() == 0, \
+                f"has NaN for {col} {id_col}"
+            if col != 'shapes':
+                assert df_dict_combined[col][id_col].is_unique, \
+                    f"not unique for {col} {id_col}"
+                assert df_dict_combined[col][id_col] \
+                    .is_monotonic_increasing, \
+                    f"not monotonic for {col} {id_col}"
 
         for dep in deps:
-            assert df_dict_combined[dep][id_col].isna().sum() == 0, \
+            if dep not in df_dict_combined or \
+               id_col not in df_dict_combined[dep]:
+                continue
+            assert df_dict_combined[dep][id_col].isna().sum() \
+                == num_missing_dict[dep, id_col], \
                 f"has NaN for dep {dep} {id_col}"
 
     return df_dict_combined
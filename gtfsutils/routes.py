@@ -1,20 +1,10 @@
+import numpy as np
 import shapely
 import pandas as pd
 import geopandas as gpd
 from . import load_gtfs
 
 
-def _get_group_route_geometry(group):
-    counts = group['counts'].iloc[0]
-    X = group.sort_values(by='stop_sequence')[
-        ['stop_lon', 'stop_lat']
-    ].values
-    coords = X if len(X) else []
-    return pd.Series(
-        [counts, coords],
-        index=['counts', 'geometry'])
-
-
 def load_routes_counts(src):
     if isinstance(src, str):
         df_dict = load_gtfs(src, subset=[
@@ -52,32 +42,40 @@ def load_routes_counts(src):
             'route_type'
         ]]
 
-    df_trips = df_trips.groupby('route_id').apply(
-        lambda g: pd.Series([
-            g['trip_id'].iloc[0], len(g)
-        ], index=['trip_id', 'counts']))
+    # First trip and number of trips per route
+    df_trips = df_trips.groupby('route_id').agg(
+        trip_id=('trip_id', 'first'),
+        counts=('trip_id', 'size'))
     df_trips = df_trips.reset_index()
 
-    trip_ids = df_trips['trip_id'].unique()
-    mask = df_stop_times['trip_id'].isin(trip_ids)
-    df_stop_times = df_stop_times[mask]
-
     trip_ids = df_trips['trip_id'].unique()
     mask = df_stop_times['trip_id'].isin(trip_ids)
     df_stop_times = pd.merge(
         df_trips[['trip_id', 'route_id', 'counts']],
         df_stop_times[mask],
         how='left', on='trip_id')
-    
+
     df_trip_shape = pd.merge(
-        df_stop_times[['stop_id', 'route_id', 'stop_sequence', 'counts']], 
+        df_stop_times[['stop_id', 'route_id', 'stop_sequence', 'counts']],
         df_stops[['stop_id', 'stop_lon', 'stop_lat']],
         how='left', on='stop_id')
-    df_trip_geometry = df_trip_shape \
-        .groupby('route_id') \
-        .apply(_get_group_route_geometry)
-    df_trip_geometry['geometry'] = df_trip_geometry['geometry'].apply(
-        shapely.geometry.LineString)
+    df_trip_shape = df_trip_shape.sort_values(['route_id', 'stop_sequence'])
+
+    # Build the lines of all routes with at least two stops at once
+    df_trip_geometry = df_trip_shape.groupby('route_id', sort=True).agg(
+        counts=('counts', 'first'),
+        num_stops=('stop_lon', 'count'))
+    df_trip_shape = df_trip_shape[df_trip_shape['stop_lon'].notna()]
+    valid = df_trip_geometry['num_stops'].values > 1
+    indices = df_trip_geometry.index.get_indexer(df_trip_shape['route_id'])
+    mask = valid[indices]
+    indices, _ = pd.factorize(indices[mask])
+    geometry = np.full(len(df_trip_geometry), shapely.LineString())
+    geometry[valid] = shapely.linestrings(
+        df_trip_shape[['stop_lon', 'stop_lat']].values[mask],
+        indices=indices)
+    df_trip_geometry['geometry'] = geometry
+    df_trip_geometry = df_trip_geometry.drop(columns='num_stops')
     df_trip_geometry = df_trip_geometry.reset_index()
 
     df = pd.merge(
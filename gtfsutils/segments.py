@@ -0,0 +1,172 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from . import load_gtfs, time_to_seconds
+from .spatial import haversine_distance
+
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS = ['from_stop', 'to_stop', 'route', 'hour']
+
+
+def _reduce(df_list):
+    df = pd.concat(df_list, ignore_index=True)
+    return df.groupby(KEY_COLUMNS, sort=False).agg(
+        trips=('trips', 'sum'),
+        runtime=('runtime', 'sum'),
+        min_runtime=('min_runtime', 'min'),
+        max_runtime=('max_runtime', 'max'),
+        distance=('distance', 'sum'),
+        distance_trips=('distance_trips', 'sum'),
+        distance_runtime=('distance_runtime', 'sum')
+    ).reset_index()
+
+
+def get_segment_statistics(src, distance='stops', chunk_size=50000,
+                           shape_dist_factor=1.0):
+    # Scheduled runtime (seconds), distance (meters) and speed (km/h) of the
+    # segments between consecutive stops, aggregated per from/to stop, route
+    # and hour of the departure. stop_times is processed in chunks of
+    # chunk_size trips to bound the memory usage.
+    if distance not in ['stops', 'shape_dist_traveled']:
+        raise ValueError(
+            f"Distance {distance} not supported!")
+
+    if isinstance(src, str):
+        df_dict = load_gtfs(src, subset=['trips', 'stop_times', 'stops'])
+    elif isinstance(src, dict):
+        df_dict = src
+    else:
+        raise ValueError(
+            f"Data type not supported: {type(src)}")
+
+    stop_times = df_dict['stop_times']
+    if distance == 'shape_dist_traveled' and \
+       'shape_dist_traveled' not in stop_times:
+        raise ValueError("shape_dist_traveled not found in stop_times.txt")
+
+    stops = df_dict['stops']
+    trips = df_dict['trips']
+    stop_lon = stops['stop_lon'].values
+    stop_lat = stops['stop_lat'].values
+
+    # Trips are numbered once, rows are grouped by trip with a single sort
+    trip_codes, trip_ids = pd.factorize(stop_times['trip_id'])
+    trip_codes = trip_codes.astype(np.int32)
+    order = np.argsort(trip_codes, kind='stable')
+    boundaries = np.searchsorted(
+        trip_codes[order], np.arange(0, len(trip_ids), chunk_size))
+    boundaries = np.r_[boundaries, len(order)]
+
+    route_codes, route_ids = pd.factorize(trips['route_id'])
+    idx = pd.Index(trips['trip_id']).get_indexer(trip_ids)
+    trip_routes = np.where(idx >= 0, route_codes[idx], -1)
+
+    stop_index = pd.Index(stops['stop_id'])
+
+    # Times are parsed once, integer seconds take less memory than strings
+    arrival_times = time_to_seconds(
+        stop_times['arrival_time'].values).astype(np.int32)
+    departure_times = time_to_seconds(
+        stop_times['departure_time'].values).astype(np.int32)
+
+    df_list = []
+    num_rows = 0
+    max_rows = 1000000
+    for start, end in zip(boundaries[:-1], boundaries[1:]):
+        rows = order[start:end]
+        codes = trip_codes[rows]
+        sequence = stop_times['stop_sequence'].values[rows]
+        rows = rows[np.lexsort((sequence, codes))]
+        codes = trip_codes[rows]
+
+        arrival = arrival_times[rows]
+        departure = departure_times[rows]
+        stop_idx = stop_index.get_indexer(stop_times['stop_id'].values[rows])
+
+        # Consecutive stops of the same trip with known times
+        mask = (codes[1:] == codes[:-1]) & (codes[:-1] >= 0) \
+            & (departure[:-1] >= 0) \
+            & (arrival[1:] >= 0) & (stop_idx[:-1] >= 0) & (stop_idx[1:] >= 0)
+        i = np.flatnonzero(mask)
+        j = i + 1
+
+        if distance == 'stops':
+            segment_distance = haversine_distance(
+                stop_lon[stop_idx[i]], stop_lat[stop_idx[i]],
+                stop_lon[stop_idx[j]], stop_lat[stop_idx[j]])
+        else:
+            shape_dist = stop_times['shape_dist_traveled'].values[rows]
+            segment_distance = (shape_dist[j] - shape_dist[i]) \
+                * shape_dist_factor
+
+        runtime = arrival[j].astype(np.int64) - departure[i]
+        # Distances can be missing (optional shape_dist_traveled, stops
+        # without coordinates), the speed only uses trips with a distance
+        has_distance = ~np.isnan(segment_distance)
+        df = pd.DataFrame({
+            'from_stop': stop_idx[i],
+            'to_stop': stop_idx[j],
+            'route': trip_routes[codes[i]],
+            'hour': departure[i] // 3600,
+            'trips': 1,
+            'runtime': runtime,
+            'min_runtime': runtime,
+            'max_runtime': runtime,
+            'distance': segment_distance,
+            'distance_trips': has_distance.astype(np.int64),
+            'distance_runtime': np.where(has_distance, runtime, 0)
+        })
+        df_list.append(_reduce([df]))
+        num_rows += len(df_list[-1])
+
+        # Merge the partial aggregates once they grow too large, the limit
+        # grows with the number of distinct segments
+        if num_rows > max_rows:
+            df_list = [_reduce(df_list)]
+            num_rows = len(df_list[0])
+            max_rows = max(max_rows, 2 * num_rows)
+
+        logger.debug(f"Processed {end:,d} of {len(order):,d} stop times")
+
+    if df_list:
+        df = _reduce(df_list)
+    else:
+        df = pd.DataFrame(columns=KEY_COLUMNS + [
+            'trips', 'runtime', 'min_runtime', 'max_runtime', 'distance',
+            'distance_trips', 'distance_runtime'])
+
+    route = df['route'].values.astype(np.int64)
+    stop_ids = stops['stop_id'].values
+    trips_count = df['trips'].values
+    runtime = df['runtime'].values.astype(float)
+    segment_distance = df['distance'].values.astype(float)
+    distance_trips = df['distance_trips'].values.astype(float)
+    distance_runtime = df['distance_runtime'].values.astype(float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_distance = np.where(
+            distance_trips > 0, segment_distance / distance_trips, np.nan)
+        speed = np.where(
+            (distance_trips > 0) & (distance_runtime > 0),
+            segment_distance / distance_runtime * 3.6, np.nan)
+
+    df = pd.DataFrame({
+        'from_stop_id': stop_ids[df['from_stop'].values.astype(np.int64)],
+        'to_stop_id': stop_ids[df['to_stop'].values.astype(np.int64)],
+        'route_id': route_ids.take(
+            route, allow_fill=True, fill_value=np.nan).values,
+        'hour': df['hour'].values.astype(np.int64),
+        'trips': trips_count,
+        'mean_runtime': runtime / trips_count,
+        'min_runtime': df['min_runtime'].values,
+        'max_runtime': df['max_runtime'].values,
+        'distance': mean_distance,
+        'speed': speed
+    })
+
+    return df.sort_values(
+        ['route_id', 'hour', 'from_stop_id', 'to_stop_id']
+    ).reset_index(drop=True)
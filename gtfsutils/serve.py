@@ -0,0 +1,318 @@
+import json
+import logging
+import os
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+import numpy as np
+
+from . import (
+    load_gtfs,
+    save_gtfs,
+    get_bounding_box,
+    get_calendar_date_range
+)
+from .filter import (
+    load_filter_geometry,
+    spatial_filter_by_stops,
+    spatial_filter_by_shapes
+)
+from .spatial import haversine_distance
+
+logger = logging.getLogger(__name__)
+
+
+def get_feed_memory_usage(df_dict):
+    return int(sum(
+        df.memory_usage(deep=True).sum() for df in df_dict.values()))
+
+
+class FeedCache:
+    def __init__(self, max_memory):
+        self.max_memory = max_memory
+        self.memory_usage = 0
+        self._feeds = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def get(self, filepath):
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"{filepath} not found")
+
+        # Feeds are reloaded when the modification time changes
+        key = os.path.abspath(filepath)
+        mtime = os.path.getmtime(filepath)
+        with self._lock:
+            df_dict = self._lookup(key, mtime)
+            if df_dict is not None:
+                return df_dict
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given feed, others wait for the result
+        with load_lock:
+            try:
+                with self._lock:
+                    df_dict = self._lookup(key, mtime)
+                    if df_dict is not None:
+                        return df_dict
+
+                t = time.time()
+                df_dict = load_gtfs(filepath)
+                nbytes = get_feed_memory_usage(df_dict)
+                logger.info(
+                    f"Loaded {filepath} ({nbytes / 2**20:,.1f} MB) "
+                    f"in {time.time() - t:.2f}s")
+
+                with self._lock:
+                    # Replace the outdated version of the feed
+                    if key in self._feeds:
+                        self.memory_usage -= self._feeds.pop(key)[1]
+                    self._feeds[key] = (df_dict, nbytes, mtime)
+                    self.memory_usage += nbytes
+                    self._evict()
+            finally:
+                with self._lock:
+                    self._load_locks.pop(key, None)
+
+        return df_dict
+
+    def _lookup(self, key, mtime):
+        if key in self._feeds and self._feeds[key][2] == mtime:
+            self._feeds.move_to_end(key)
+            return self._feeds[key][0]
+        return None
+
+    def _evict(self):
+        # Always keep the most recently used feed, even if it is too large
+        while self.memory_usage > self.max_memory and len(self._feeds) > 1:
+            filepath, (_, nbytes, _) = self._feeds.popitem(last=False)
+            self.memory_usage -= nbytes
+            logger.info(f"Evicted {filepath} ({nbytes / 2**20:,.1f} MB)")
+
+    def info(self):
+        with self._lock:
+            return {
+                'max_memory': self.max_memory,
+                'memory_usage': self.memory_usage,
+                'feeds': [
+                    {'src': filepath, 'memory_usage': nbytes}
+                    for filepath, (_, nbytes, _) in self._feeds.items()
+                ]
+            }
+
+
+def get_feed_info(df_dict):
+    info = {
+        'files': {key: len(df) for key, df in sorted(df_dict.items())},
+        'bounds': [float(v) for v in get_bounding_box(df_dict)]
+    }
+    if 'calendar' in df_dict:
+        min_date, max_date = get_calendar_date_range(df_dict)
+        info['date_range'] = [
+            min_date.strftime('%Y-%m-%d'),
+            max_date.strftime('%Y-%m-%d')
+        ]
+
+    return info
+
+
+def get_nearest_stops(df_dict, lon, lat, k=1):
+    if k < 1:
+        raise ValueError(f"k must be at least 1, got {k}")
+
+    stops = df_dict['stops']
+    distances = haversine_distance(
+        stops['stop_lon'].values, stops['stop_lat'].values, lon, lat)
+
+    k = min(k, len(distances))
+    idx = np.argpartition(distances, k - 1)[:k]
+    idx = idx[np.argsort(distances[idx])]
+
+    items = []
+    for i in idx:
+        items.append({
+            'stop_id': str(stops['stop_id'].iloc[i]),
+            'stop_name': str(stops['stop_name'].iloc[i]),
+            'stop_lon': float(stops['stop_lon'].iloc[i]),
+            'stop_lat': float(stops['stop_lat'].iloc[i]),
+            'distance': float(distances[i])
+        })
+
+    return items
+
+
+def filter_feed(df_dict, dst, bounds, target='stops', operation='within',
+                overwrite=False):
+    if os.path.exists(dst) and not overwrite:
+        raise FileExistsError(f"{dst} already exists")
+
+    # Filters replace the tables in the dictionary instead of modifying
+    # them, so a shallow copy keeps the cached feed intact
+    df_dict = dict(df_dict)
+    filter_geometry = load_filter_geometry(bounds)
+
+    if target == 'stops':
+        spatial_filter_by_stops(df_dict, filter_geometry)
+    elif target == 'shapes':
+        spatial_filter_by_shapes(
+            df_dict, filter_geometry, operation=operation)
+    else:
+        raise ValueError(
+            f"Target {target} not supported!")
+
+    save_gtfs(df_dict, dst, ignore_required=True, overwrite=overwrite)
+
+    return {
+        'dst': dst,
+        'files': {key: len(df) for key, df in sorted(df_dict.items())}
+    }
+
+
+class FeedRequestHandler(BaseHTTPRequestHandler):
+    server_version = "gtfsutils"
+
+    def do_GET(self):
+        self.handle_request({})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError as e:
+            self.send_json(400, {'error': f"Invalid request body: {e}"})
+            return
+        if not isinstance(body, dict):
+            self.send_json(400, {'error': "Request body must be an object"})
+            return
+        self.handle_request(body)
+
+    def handle_request(self, body):
+        url = urlparse(self.path)
+        params = dict(parse_qsl(url.query))
+        params.update(body)
+        method = url.path.strip('/')
+
+        t = time.time()
+        try:
+            result = self.server.dispatch(method, params)
+        except (ValueError, KeyError) as e:
+            self.send_json(400, {'error': f"[{e.__class__.__name__}] {e}"})
+        except FileNotFoundError as e:
+            self.send_json(404, {'error': str(e)})
+        except FileExistsError as e:
+            self.send_json(409, {'error': str(e)})
+        except Exception as e:
+            logger.exception(f"Request {self.path} failed")
+            self.send_json(500, {'error': f"[{e.__class__.__name__}] {e}"})
+        else:
+            self.send_json(200, result)
+        logger.debug(f"{method} handled in {time.time() - t:.3f}s")
+
+    def send_json(self, status, data):
+        content = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def address_string(self):
+        # Unix socket clients have no address
+        if isinstance(self.client_address, tuple):
+            return str(self.client_address[0])
+        return 'unix'
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class FeedServerMixIn:
+    def setup_feeds(self, max_memory, workers):
+        self.cache = FeedCache(max_memory)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    def dispatch(self, method, params):
+        if method == 'cache':
+            return self.cache.info()
+
+        if 'src' not in params:
+            raise ValueError("No input file specified")
+        df_dict = self.cache.get(params['src'])
+
+        if method == 'bounds':
+            return [float(v) for v in get_bounding_box(df_dict)]
+        elif method == 'info':
+            return get_feed_info(df_dict)
+        elif method == 'nearest':
+            return get_nearest_stops(
+                df_dict,
+                float(params['lon']),
+                float(params['lat']),
+                k=int(params.get('k', 1)))
+        elif method == 'filter':
+            if 'dst' not in params:
+                raise ValueError("No output file specified")
+            if 'bounds' not in params:
+                raise ValueError("No bounds defined")
+            bounds = params['bounds']
+            if isinstance(bounds, list):
+                bounds = json.dumps(bounds)
+
+            # Filters are CPU heavy, run them on the bounded worker pool
+            future = self.executor.submit(
+                filter_feed, df_dict, params['dst'], bounds,
+                target=params.get('target', 'stops'),
+                operation=params.get('operation', 'within'),
+                overwrite=str(params.get('overwrite', '')).lower()
+                in ('1', 'true'))
+            return future.result()
+        else:
+            raise ValueError(f"Method {method} not supported!")
+
+    def server_close(self):
+        # Also called by the constructor if binding fails, before the
+        # executor is set up
+        super().server_close()
+        executor = getattr(self, 'executor', None)
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+class FeedHTTPServer(FeedServerMixIn, ThreadingHTTPServer):
+    pass
+
+
+class FeedUnixServer(FeedServerMixIn, socketserver.ThreadingMixIn,
+                     socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(host='127.0.0.1', port=8000, socket_path=None,
+          max_memory=2 * 2**30, workers=4, preload=None):
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = FeedUnixServer(socket_path, FeedRequestHandler)
+        address = socket_path
+    else:
+        server = FeedHTTPServer((host, port), FeedRequestHandler)
+        address = f"http://{host}:{port}"
+    server.setup_feeds(max_memory, workers)
+
+    for filepath in preload or []:
+        server.cache.get(filepath)
+
+    logger.info(f"Serving GTFS feeds on {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
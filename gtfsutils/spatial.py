@@ -0,0 +1,36 @@
+import numpy as np
+
+EARTH_RADIUS = 6371008.8
+
+
+def haversine_distance(lon1, lat1, lon2, lat2):
+    lon1, lat1, lon2, lat2 = map(
+        np.radians, (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 \
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+
+def project_lonlat(lon, lat):
+    # Local equirectangular projection in meters, scaled by the latitude of
+    # each point. Distorts large distances, but the distances between nearby
+    # points stay accurate even for feeds that span a whole country.
+    lon = np.radians(np.asarray(lon, dtype=float))
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon_0 = np.nanmean(lon) if len(lon) else 0.0
+
+    return EARTH_RADIUS * (lon - lon_0) * np.cos(lat), EARTH_RADIUS * lat
+
+
+def query_pairs(x, y, max_distance):
+    # Returns index pairs (i < j) of all points within max_distance of each
+    # other, using a spatial index instead of comparing all pairs
+    import shapely
+
+    points = shapely.points(x, y)
+    tree = shapely.STRtree(points)
+    i, j = tree.query(points, predicate='dwithin', distance=max_distance)
+    mask = i < j
+
+    return i[mask], j[mask]
@@ -0,0 +1,249 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from . import load_gtfs, time_to_seconds, WEEKDAYS
+
+
+def _parse_date(date):
+    if isinstance(date, datetime.datetime):
+        return date.date()
+    elif isinstance(date, datetime.date):
+        return date
+
+    return datetime.datetime.strptime(str(date), "%Y%m%d").date()
+
+
+def get_service_ids(src, date):
+    if isinstance(src, str):
+        df_dict = load_gtfs(src, subset=['calendar', 'calendar_dates'])
+    elif isinstance(src, dict):
+        df_dict = src
+    else:
+        raise ValueError(
+            f"Data type not supported: {type(src)}")
+
+    date = _parse_date(date)
+    date_int = int(date.strftime("%Y%m%d"))
+    service_ids = set()
+
+    if 'calendar' in df_dict:
+        df = df_dict['calendar']
+        mask = (df['start_date'].astype(int) <= date_int) \
+            & (df['end_date'].astype(int) >= date_int) \
+            & (df[WEEKDAYS[date.weekday()]] == 1)
+        service_ids.update(df.loc[mask, 'service_id'])
+
+    if 'calendar_dates' in df_dict:
+        df = df_dict['calendar_dates']
+        df = df[df['date'].astype(int) == date_int]
+        service_ids.update(df.loc[df['exception_type'] == 1, 'service_id'])
+        service_ids.difference_update(
+            df.loc[df['exception_type'] == 2, 'service_id'])
+
+    return sorted(service_ids, key=str)
+
+
+def _expand_frequencies(df_frequencies, trip_ids, trip_codes, times):
+    # Template trips in frequencies.txt run once per headway within each
+    # window, shifted from their first departure in stop_times.txt to the
+    # start of the run. Returns the index of the stop time, the time and a
+    # code per trip run for the regular and the expanded stop times.
+    # trip_ids are the unique trip ids, trip_codes index into them
+    num_trips = len(trip_ids)
+    template = pd.Index(trip_ids).get_indexer(
+        df_frequencies['trip_id'].values)
+    start = time_to_seconds(df_frequencies['start_time'].values)
+    end = time_to_seconds(df_frequencies['end_time'].values)
+    headway = pd.to_numeric(
+        df_frequencies['headway_secs'], errors='coerce').values
+    valid = (template >= 0) & (start >= 0) & (end > start) & (headway > 0)
+    template, start = template[valid], start[valid]
+    end, headway = end[valid], headway[valid].astype(np.int64)
+
+    # Departures at start, start + headway, ... before the end of the window
+    num_runs = (end - start + headway - 1) // headway
+    window = np.repeat(np.arange(len(template)), num_runs)
+    offset = np.arange(len(window)) \
+        - np.repeat(np.cumsum(num_runs) - num_runs, num_runs)
+    run_trip = template[window]
+    run_start = start[window] + offset * headway[window]
+
+    # Stop times of the template trips, grouped by trip
+    is_template = np.isin(trip_codes, template)
+    order = np.flatnonzero(is_template)
+    order = order[np.argsort(trip_codes[order], kind='stable')]
+    counts = np.bincount(trip_codes[order], minlength=num_trips)
+    first_row = np.cumsum(counts) - counts
+    first_time = np.full(num_trips, np.iinfo(np.int64).max)
+    np.minimum.at(first_time, trip_codes[order], times[order])
+
+    # Repeat the stop times of the template trip for every run
+    run_counts = counts[run_trip]
+    run = np.repeat(np.arange(len(run_trip)), run_counts)
+    position = np.arange(len(run)) \
+        - np.repeat(np.cumsum(run_counts) - run_counts, run_counts)
+    idx = order[first_row[run_trip[run]] + position]
+    run_times = times[idx] - first_time[run_trip[run]] + run_start[run]
+
+    regular = np.flatnonzero(~is_template)
+    return (
+        np.r_[regular, idx],
+        np.r_[times[regular], run_times],
+        np.r_[trip_codes[regular], num_trips + run]
+    )
+
+
+def _load_departures(src, date, by):
+    if isinstance(src, str):
+        df_dict = load_gtfs(src, subset=[
+            'trips', 'stop_times', 'calendar', 'calendar_dates',
+            'frequencies'
+        ])
+    elif isinstance(src, dict):
+        df_dict = src
+    else:
+        raise ValueError(
+            f"Data type not supported: {type(src)}")
+
+    trips = df_dict['trips']
+    trips = trips[trips['service_id'].isin(get_service_ids(df_dict, date))]
+
+    stop_times = df_dict['stop_times']
+    stop_times = stop_times[stop_times['trip_id'].isin(trips['trip_id'])]
+
+    # Departure in seconds, arrival if the departure is missing
+    times = time_to_seconds(stop_times['departure_time'].values)
+    arrival = time_to_seconds(stop_times['arrival_time'].values)
+    times = np.where(times >= 0, times, arrival)
+    rows = np.flatnonzero(times >= 0)
+    times = times[rows]
+    trip_codes, trip_ids = pd.factorize(stop_times['trip_id'].values[rows])
+
+    if 'frequencies' in df_dict:
+        idx, times, trip_codes = _expand_frequencies(
+            df_dict['frequencies'], trip_ids, trip_codes, times)
+        rows = rows[idx]
+    trip_ids = stop_times['trip_id'].values[rows]
+
+    # Without stop_id only the first departure of each trip counts
+    if 'stop_id' in by:
+        stop_ids = stop_times['stop_id'].values[rows]
+    else:
+        sequence = stop_times['stop_sequence'].values[rows]
+        order = np.lexsort((sequence, trip_codes))
+        trip_codes = trip_codes[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = trip_codes[1:] != trip_codes[:-1]
+        idx = order[first]
+        trip_ids, times = trip_ids[idx], times[idx]
+        stop_ids = None
+
+    idx = pd.Index(trips['trip_id']).get_indexer(trip_ids)
+    df = pd.DataFrame(index=np.arange(len(idx)))
+    for col in by:
+        if col == 'stop_id':
+            continue
+        elif col in trips:
+            df[col] = trips[col].values[idx]
+        elif col == 'direction_id':
+            # direction_id is optional
+            df[col] = np.nan
+        else:
+            raise ValueError(f"Column {col} not in trips.txt")
+    if stop_ids is not None:
+        df['stop_id'] = stop_ids
+    df['departure'] = times
+
+    return df[by + ['departure']]
+
+
+def _sort_departures(df, by):
+    group = df.groupby(by, sort=True, dropna=False).ngroup().values
+    times = df['departure'].values
+    order = np.lexsort((times, group))
+
+    return group[order], times[order], order
+
+
+def get_trips_per_hour(src, date, by=('route_id', 'direction_id')):
+    by = list(by)
+    df = _load_departures(src, date, by)
+    if df.empty:
+        return pd.DataFrame(columns=by + ['hour', 'trips'])
+
+    hour = df['departure'].values // 3600
+    df = df[by].assign(hour=hour)
+
+    return df.groupby(by + ['hour'], dropna=False).size() \
+        .rename('trips').reset_index()
+
+
+def get_service_statistics(src, date, by=('route_id', 'direction_id')):
+    # All times and headways are in seconds. Template trips in
+    # frequencies.txt count once per run.
+    by = list(by)
+    df = _load_departures(src, date, by)
+    columns = [
+        'trips', 'first_departure', 'last_departure', 'span',
+        'mean_headway', 'min_headway', 'max_headway',
+        'peak_hour', 'peak_trips', 'peak_headway'
+    ]
+    if df.empty:
+        return pd.DataFrame(columns=by + columns)
+
+    group, times, order = _sort_departures(df, by)
+    n = len(times)
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    ends = np.r_[starts[1:], n]
+    counts = ends - starts
+
+    first_departure = times[starts]
+    last_departure = times[ends - 1]
+    span = last_departure - first_departure
+
+    # Headways between consecutive departures of the same group, the
+    # differences across group boundaries are masked
+    headways = np.diff(times).astype(float)
+    same_group = group[1:] == group[:-1]
+    min_headway = np.minimum.reduceat(
+        np.r_[np.where(same_group, headways, np.inf), np.inf], starts)
+    max_headway = np.maximum.reduceat(
+        np.r_[np.where(same_group, headways, -np.inf), -np.inf], starts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_headway = np.where(counts > 1, span / (counts - 1), np.nan)
+    min_headway[~np.isfinite(min_headway)] = np.nan
+    max_headway[~np.isfinite(max_headway)] = np.nan
+
+    # Busiest hour of each group, the departures are sorted by group and
+    # time, so the departures of each hour are consecutive runs
+    hours = times // 3600
+    run_starts = np.flatnonzero(
+        np.r_[True, (group[1:] != group[:-1]) | (hours[1:] != hours[:-1])])
+    run_counts = np.diff(np.r_[run_starts, n])
+    run_group = group[run_starts]
+    group_run_starts = np.flatnonzero(
+        np.r_[True, run_group[1:] != run_group[:-1]])
+    peak_trips = np.maximum.reduceat(run_counts, group_run_starts)
+    is_peak = run_counts == np.repeat(
+        peak_trips, np.diff(np.r_[group_run_starts, len(run_starts)]))
+    # First (earliest) peak run of each group
+    peak_runs = np.flatnonzero(is_peak)
+    peak_runs = peak_runs[np.r_[
+        True, run_group[peak_runs][1:] != run_group[peak_runs][:-1]]]
+    peak_hour = hours[run_starts[peak_runs]]
+
+    df_stats = df.iloc[order[starts]][by].reset_index(drop=True)
+    df_stats['trips'] = counts
+    df_stats['first_departure'] = first_departure
+    df_stats['last_departure'] = last_departure
+    df_stats['span'] = span
+    df_stats['mean_headway'] = mean_headway
+    df_stats['min_headway'] = min_headway
+    df_stats['max_headway'] = max_headway
+    df_stats['peak_hour'] = peak_hour
+    df_stats['peak_trips'] = peak_trips
+    df_stats['peak_headway'] = 3600 / peak_trips
+
+    return df_stats
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from . import load_gtfs
+from .spatial import project_lonlat, query_pairs
+
+
+def generate_transfers(src, max_distance=300.0, walking_speed=1.2,
+                       detour_factor=1.2):
+    if isinstance(src, str):
+        df_dict = load_gtfs(src, subset=['stops'])
+    elif isinstance(src, dict):
+        df_dict = src
+    else:
+        raise ValueError(
+            f"Data type not supported: {type(src)}")
+
+    # Transfers are between stops or platforms, not stations or entrances
+    stops = df_dict['stops']
+    if 'location_type' in stops:
+        stops = stops[stops['location_type'].fillna(0) == 0]
+    stops = stops[stops['stop_lon'].notna() & stops['stop_lat'].notna()]
+
+    x, y = project_lonlat(stops['stop_lon'].values, stops['stop_lat'].values)
+    i, j = query_pairs(x, y, max_distance)
+
+    # Platforms of the same station are always connected
+    if 'parent_station' in stops:
+        df = pd.DataFrame({
+            'idx': np.arange(len(stops)),
+            'parent_station': stops['parent_station'].values
+        }).dropna()
+        df = pd.merge(df, df, on='parent_station')
+        df = df[df['idx_x'] < df['idx_y']]
+        pairs = pd.DataFrame({
+            'i': np.concatenate([i, df['idx_x'].values]),
+            'j': np.concatenate([j, df['idx_y'].values])
+        }).drop_duplicates()
+        i, j = pairs['i'].values, pairs['j'].values
+
+    distance = np.hypot(x[i] - x[j], y[i] - y[j])
+    duration = np.ceil(distance * detour_factor / walking_speed) \
+        .astype(np.int64)
+
+    stop_ids = stops['stop_id'].values
+
+    return pd.DataFrame({
+        'from_stop_id': np.concatenate([stop_ids[i], stop_ids[j]]),
+        'to_stop_id': np.concatenate([stop_ids[j], stop_ids[i]]),
+        'transfer_type': 2,
+        'min_transfer_time': np.concatenate([duration, duration])
+    })
+
+
+def add_transfers(df_dict, max_distance=300.0, walking_speed=1.2,
+                  detour_factor=1.2):
+    df_transfers = generate_transfers(
+        df_dict,
+        max_distance=max_distance,
+        walking_speed=walking_speed,
+        detour_factor=detour_factor)
+
+    # Existing transfers take precedence over generated ones
+    if 'transfers' in df_dict:
+        df_existing = df_dict['transfers']
+        key = pd.MultiIndex.from_frame(
+            df_transfers[['from_stop_id', 'to_stop_id']])
+        existing_key = pd.MultiIndex.from_frame(
+            df_existing[['from_stop_id', 'to_stop_id']])
+        df_transfers = df_transfers[~key.isin(existing_key)]
+        df_transfers = pd.concat([df_existing, df_transfers])
+
+    df_dict['transfers'] = df_transfers.reset_index(drop=True)
@@ -0,0 +1,305 @@
+import numpy as np
+import pandas as pd
+
+from . import load_gtfs, time_to_seconds, WEEKDAYS
+
+PRIMARY_KEYS = {
+    'agency':          ['agency_id'],
+    'stops':           ['stop_id'],
+    'routes':          ['route_id'],
+    'trips':           ['trip_id'],
+    'calendar':        ['service_id'],
+    'calendar_dates':  ['service_id', 'date'],
+    'fare_attributes': ['fare_id'],
+    'shapes':          ['shape_id', 'shape_pt_sequence'],
+    'frequencies':     ['trip_id', 'start_time'],
+    'pathways':        ['pathway_id'],
+    'levels':          ['level_id'],
+}
+
+# (table, column, referenced table, referenced column)
+FOREIGN_KEYS = [
+    ('routes',      'agency_id',      'agency',          'agency_id'),
+    ('trips',       'route_id',       'routes',          'route_id'),
+    ('trips',       'shape_id',       'shapes',          'shape_id'),
+    ('stop_times',  'trip_id',        'trips',           'trip_id'),
+    ('stop_times',  'stop_id',        'stops',           'stop_id'),
+    ('stops',       'parent_station', 'stops',           'stop_id'),
+    ('stops',       'level_id',       'levels',          'level_id'),
+    ('frequencies', 'trip_id',        'trips',           'trip_id'),
+    ('transfers',   'from_stop_id',   'stops',           'stop_id'),
+    ('transfers',   'to_stop_id',     'stops',           'stop_id'),
+    ('pathways',    'from_stop_id',   'stops',           'stop_id'),
+    ('pathways',    'to_stop_id',     'stops',           'stop_id'),
+    ('fare_rules',  'fare_id',        'fare_attributes', 'fare_id'),
+    ('fare_rules',  'route_id',       'routes',          'route_id'),
+]
+
+
+def _as_key(values):
+    # Ids with missing values are read as floats, convert them back to
+    # integers so that they compare equal to the ids in other tables
+    values = pd.Series(values)
+    if values.dtype.kind == 'f':
+        non_null = values.dropna()
+        if (non_null == non_null.round()).all():
+            values = values.astype('Int64')
+
+    return values
+
+
+def _result(check, table, column, df_invalid, num_samples, reference=None):
+    sample = df_invalid.head(num_samples).astype(object)
+    sample = sample.where(sample.notna(), None)
+
+    return {
+        'check': check,
+        'table': table,
+        'column': column,
+        'reference': reference,
+        'count': len(df_invalid),
+        'sample': sample.to_dict(orient='records')
+    }
+
+
+def check_primary_keys(df_dict, num_samples=5):
+    results = []
+    for table, columns in PRIMARY_KEYS.items():
+        if table not in df_dict or \
+           not all(col in df_dict[table] for col in columns):
+            continue
+
+        df = df_dict[table]
+        mask = df.duplicated(subset=columns, keep=False)
+        results.append(_result(
+            'primary_key', table, ', '.join(columns),
+            df[mask], num_samples))
+
+    return results
+
+
+def check_foreign_keys(df_dict, num_samples=5):
+    results = []
+    for table, column, ref_table, ref_column in FOREIGN_KEYS:
+        if table not in df_dict or column not in df_dict[table]:
+            continue
+
+        df = df_dict[table]
+        values = _as_key(df[column])
+        if ref_table in df_dict and ref_column in df_dict[ref_table]:
+            ref_values = _as_key(df_dict[ref_table][ref_column].dropna())
+            if (values.dtype.kind == 'O') != (ref_values.dtype.kind == 'O'):
+                values = values.astype(str)
+                ref_values = ref_values.astype(str)
+            # Empty optional references are allowed
+            mask = df[column].notna().values \
+                & ~values.isin(ref_values.unique()).values
+        else:
+            mask = df[column].notna().values
+
+        results.append(_result(
+            'foreign_key', table, column,
+            df[mask], num_samples,
+            reference=f"{ref_table}.{ref_column}"))
+
+    # Services can be defined in calendar.txt, calendar_dates.txt or both
+    if 'trips' in df_dict:
+        df = df_dict['trips']
+        service_ids = [
+            _as_key(df_dict[key]['service_id'])
+            for key in ['calendar', 'calendar_dates'] if key in df_dict
+        ]
+        values = _as_key(df['service_id'])
+        mask = np.ones(len(df), dtype=bool)
+        for ref_values in service_ids:
+            if (values.dtype.kind == 'O') != (ref_values.dtype.kind == 'O'):
+                mask &= ~values.astype(str).isin(
+                    ref_values.astype(str).unique()).values
+            else:
+                mask &= ~values.isin(ref_values.unique()).values
+
+        results.append(_result(
+            'foreign_key', 'trips', 'service_id',
+            df[mask], num_samples,
+            reference="calendar.service_id, calendar_dates.service_id"))
+
+    return results
+
+
+def check_stop_times(df_dict, num_samples=5):
+    if 'stop_times' not in df_dict:
+        return []
+
+    df = df_dict['stop_times']
+    trip_codes, _ = pd.factorize(df['trip_id'])
+    sequence = df['stop_sequence'].values
+    order = np.lexsort((sequence, trip_codes))
+
+    trip_codes = trip_codes[order]
+    sequence = sequence[order]
+    arrival = time_to_seconds(df['arrival_time'].values[order])
+    departure = time_to_seconds(df['departure_time'].values[order])
+    same_trip = trip_codes[1:] == trip_codes[:-1]
+
+    results = []
+
+    # Times that are given but can't be parsed, empty times are allowed
+    for column, seconds in [('arrival_time', arrival),
+                            ('departure_time', departure)]:
+        values = df[column].values[order]
+        given = pd.Series(values).astype(str).str.strip().ne('').values \
+            & pd.notna(values)
+        mask = given & (seconds < 0)
+        results.append(_result(
+            'format', 'stop_times', column,
+            df.iloc[order[mask]], num_samples))
+
+    # stop_sequence must be strictly increasing within a trip
+    mask = same_trip & (sequence[1:] <= sequence[:-1])
+    results.append(_result(
+        'increasing', 'stop_times', 'stop_sequence',
+        df.iloc[order[1:][mask]], num_samples))
+
+    # Departure must not be before arrival at the same stop
+    mask = (arrival >= 0) & (departure >= 0) & (departure < arrival)
+    results.append(_result(
+        'increasing', 'stop_times', 'arrival_time, departure_time',
+        df.iloc[order[mask]], num_samples))
+
+    # Arrival must not be before the last known departure of the trip,
+    # stops without times (non-timepoints) are skipped
+    idx = np.arange(len(order))
+    idx_departure = np.where(departure >= 0, idx, -1)
+    idx_departure = np.maximum.accumulate(idx_departure)
+    prev = idx_departure[:-1]
+    valid = (prev >= 0) & (arrival[1:] >= 0)
+    valid[valid] &= trip_codes[prev[valid]] == trip_codes[1:][valid]
+    mask = np.zeros(len(valid), dtype=bool)
+    mask[valid] = arrival[1:][valid] < departure[prev[valid]]
+    results.append(_result(
+        'increasing', 'stop_times', 'departure_time, arrival_time',
+        df.iloc[order[1:][mask]], num_samples))
+
+    return results
+
+
+def _to_date(values):
+    return pd.to_datetime(
+        pd.Series(values).astype(str), format='%Y%m%d', errors='coerce'
+    ).values.astype('datetime64[D]')
+
+
+def check_calendar_coverage(df_dict, num_samples=5):
+    if 'calendar' not in df_dict and 'calendar_dates' not in df_dict:
+        return []
+
+    results = []
+    num_dates = pd.Series(dtype=np.int64)
+
+    if 'calendar' in df_dict:
+        df = df_dict['calendar']
+        start_date = _to_date(df['start_date'])
+        end_date = _to_date(df['end_date'])
+
+        mask = np.isnat(start_date) | np.isnat(end_date) \
+            | (end_date < start_date)
+        results.append(_result(
+            'date_range', 'calendar', 'start_date, end_date',
+            df[mask], num_samples))
+
+        # Duplicate service_ids are reported by the primary key check, the
+        # service days are counted for the first row of each service
+        df = df.drop_duplicates(subset=['service_id'])
+        start_date = _to_date(df['start_date'])
+        end_date = _to_date(df['end_date'])
+
+        # Count the days of the service pattern, one weekday at a time
+        valid = ~(np.isnat(start_date) | np.isnat(end_date)
+                  | (end_date < start_date))
+        counts = np.zeros(len(df), dtype=np.int64)
+        for i, weekday in enumerate(WEEKDAYS):
+            weekmask = [0] * 7
+            weekmask[i] = 1
+            counts[valid] += df[weekday].values[valid].astype(np.int64) \
+                * np.busday_count(
+                    start_date[valid], end_date[valid] + 1,
+                    weekmask=weekmask)
+        num_dates = pd.Series(counts, index=_as_key(df['service_id']).values)
+
+    if 'calendar_dates' in df_dict:
+        df = df_dict['calendar_dates'] \
+            .drop_duplicates(subset=['service_id', 'date'])
+        service_ids = _as_key(df['service_id']).values
+        dates = _to_date(df['date'])
+
+        # Exceptions only change the number of service days if they differ
+        # from the regular service pattern
+        active = np.zeros(len(df), dtype=bool)
+        if 'calendar' in df_dict:
+            df_calendar = df_dict['calendar'] \
+                .drop_duplicates(subset=['service_id'])
+            idx = pd.Index(_as_key(df_calendar['service_id'])) \
+                .get_indexer(service_ids)
+            found = idx >= 0
+            start_date = _to_date(df_calendar['start_date'])[idx[found]]
+            end_date = _to_date(df_calendar['end_date'])[idx[found]]
+            weekday = (dates[found].astype(np.int64) + 3) % 7
+            flags = df_calendar[WEEKDAYS].values[idx[found], weekday]
+            active[found] = (dates[found] >= start_date) \
+                & (dates[found] <= end_date) & (flags == 1)
+
+        exception_type = df['exception_type'].values
+        delta = np.where((exception_type == 1) & ~active, 1, 0) \
+            - np.where((exception_type == 2) & active, 1, 0)
+        delta = pd.Series(delta, index=service_ids) \
+            .groupby(level=0).sum()
+        num_dates = num_dates.add(delta, fill_value=0)
+
+    # Services without any day of service
+    service_ids = num_dates.index[num_dates.values <= 0]
+    df = pd.DataFrame({'service_id': service_ids, 'num_dates': 0})
+    results.append(_result(
+        'coverage', 'calendar', 'service_id', df, num_samples))
+
+    return results
+
+
+def validate_gtfs(src, num_samples=5):
+    if isinstance(src, str):
+        df_dict = load_gtfs(src)
+    elif isinstance(src, dict):
+        df_dict = src
+    else:
+        raise ValueError(
+            f"Data type not supported: {type(src)}")
+
+    results = []
+    results += check_primary_keys(df_dict, num_samples)
+    results += check_foreign_keys(df_dict, num_samples)
+    results += check_stop_times(df_dict, num_samples)
+    results += check_calendar_coverage(df_dict, num_samples)
+
+    return {
+        'valid': all(result['count'] == 0 for result in results),
+        'num_errors': sum(result['count'] for result in results),
+        'checks': results
+    }
+
+
+def print_report(report):
+    print("\nChecks:")
+    for result in report['checks']:
+        name = f"{result['table']}.txt ({result['column']})"
+        if result['reference'] is not None:
+            name += f" -> {result['reference']}"
+        status = 'ok' if result['count'] == 0 else 'FAILED'
+        print(f"  {result['check']:<12s} {name:<60s} "
+              f"{result['count']:12,d} {status}")
+
+    for result in report['checks']:
+        if result['count'] > 0:
+            print(f"\n{result['check']} {result['table']}.txt "
+                  f"({result['column']}), sample rows:")
+            print(pd.DataFrame(result['sample']).to_string(index=False))
+
+    print(f"\n{report['num_errors']:,d} errors\n")
@@ -59,6 +59,9 @@ setup(
     platforms='any',
     packages=['gtfsutils'],
     install_requires=requirements,
+    extras_require={
+        'export': ['pyarrow']
+    },
     entry_points={
         "console_scripts": [
             "gtfsutils = gtfsutils.__main__:main"
@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def feed():
+    return {
+        'agency': pd.DataFrame({
+            'agency_id': ['A'],
+            'agency_name': ['Agency']
+        }),
+        'stops': pd.DataFrame({
+            'stop_id': ['S1', 'S2'],
+            'stop_name': ['Stop 1', 'Stop 2'],
+            'stop_lon': [16.37, 16.38],
+            'stop_lat': [48.21, 48.22]
+        }),
+        'routes': pd.DataFrame({
+            'route_id': ['R1'],
+            'agency_id': ['A'],
+            'route_type': [3]
+        }),
+        'trips': pd.DataFrame({
+            'route_id': ['R1'],
+            'service_id': ['WD'],
+            'trip_id': ['T1'],
+            'direction_id': [0]
+        }),
+        'stop_times': pd.DataFrame({
+            'trip_id': ['T1', 'T1'],
+            'stop_id': ['S1', 'S2'],
+            'stop_sequence': [1, 2],
+            'arrival_time': ['08:00:00', '08:05:00'],
+            'departure_time': ['08:00:00', '08:05:00']
+        }),
+        'calendar': pd.DataFrame({
+            'service_id': ['WD'],
+            'monday': [1], 'tuesday': [1], 'wednesday': [1],
+            'thursday': [1], 'friday': [1], 'saturday': [0], 'sunday': [0],
+            'start_date': [20230101],
+            'end_date': [20231231]
+        }),
+        'calendar_dates': pd.DataFrame({
+            'service_id': ['WD'],
+            'date': [20230102],
+            'exception_type': [2]
+        })
+    }
@@ -0,0 +1,25 @@
+from gtfsutils import save_gtfs
+from gtfsutils.batch import run_job
+
+
+def test_run_job_skip_existing(feed, tmp_path):
+    src = str(tmp_path / 'feed.gtfs.zip')
+    dst = str(tmp_path / 'filtered.gtfs.zip')
+    save_gtfs(feed, src)
+    job = {
+        'src': src,
+        'dst': dst,
+        'bounds': "[16.0, 48.0, 17.0, 49.0]",
+        'target': 'stops',
+        'operation': 'within'
+    }
+
+    result = run_job(job)
+    assert result['status'] == 'ok'
+
+    result = run_job(job)
+    assert result['status'] == 'skipped'
+    assert 'save_duration' not in result
+
+    result = run_job(job, overwrite=True)
+    assert result['status'] == 'ok'
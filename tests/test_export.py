@@ -0,0 +1,109 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+
+from gtfsutils import load_shapes
+from gtfsutils.export import export_gtfs, read_layer
+from gtfsutils.routes import load_routes_counts
+
+
+
+@pytest.fixture
+def export_feed(feed):
+    # A grid of stops, R2 only serves a single stop
+    lon, lat = np.meshgrid(np.linspace(16.2, 16.5, 10),
+                           np.linspace(48.0, 48.3, 10))
+    stop_ids = [f"S{i}" for i in range(lon.size)]
+    feed['stops'] = pd.DataFrame({
+        'stop_id': stop_ids,
+        'stop_name': stop_ids,
+        'stop_lon': lon.ravel(),
+        'stop_lat': lat.ravel()
+    })
+    feed['routes'] = pd.DataFrame({
+        'route_id': ['R1', 'R2'],
+        'agency_id': ['A', 'A'],
+        'route_short_name': ['1', '2'],
+        'route_long_name': ['One', 'Two'],
+        'route_type': [3, 3]
+    })
+    feed['trips'] = pd.DataFrame({
+        'route_id': ['R1', 'R1', 'R2'],
+        'service_id': ['WD', 'WD', 'WD'],
+        'trip_id': ['T1', 'T2', 'T3']
+    })
+    feed['stop_times'] = pd.DataFrame({
+        'trip_id': ['T1', 'T1', 'T1', 'T2', 'T2', 'T2', 'T3'],
+        'stop_id': ['S2', 'S0', 'S1', 'S0', 'S1', 'S2', 'S50'],
+        'stop_sequence': [3, 1, 2, 1, 2, 3, 1],
+        'arrival_time': '08:00:00',
+        'departure_time': '08:00:00'
+    })
+    feed['shapes'] = pd.DataFrame({
+        'shape_id': ['SH1', 'SH1', 'SH1', 'SH2', 'SH2', 'SH3'],
+        'shape_pt_lon': [16.3, 16.2, 16.4, 16.45, 16.5, 16.0],
+        'shape_pt_lat': [48.1, 48.0, 48.2, 48.25, 48.3, 48.0],
+        'shape_pt_sequence': [2, 1, 3, 1, 2, 1]
+    })
+    return feed
+
+
+def test_load_shapes(export_feed):
+    gdf = load_shapes(export_feed).set_index('shape_id')
+
+    # Shapes with a single point have no line
+    assert list(gdf.index) == ['SH1', 'SH2']
+    assert list(gdf.geometry['SH1'].coords) == [
+        (16.2, 48.0), (16.3, 48.1), (16.4, 48.2)]
+
+
+def test_load_routes_counts(export_feed):
+    gdf = load_routes_counts(export_feed).set_index('route_id')
+
+    assert gdf.loc['R1', 'counts'] == 2
+    assert gdf.loc['R2', 'counts'] == 1
+    assert list(gdf.geometry['R1'].coords) == [
+        tuple(export_feed['stops'].loc[i, ['stop_lon', 'stop_lat']])
+        for i in range(3)]
+    # A single stop gives an empty line
+    assert gdf.geometry['R2'].is_empty
+
+
+@pytest.mark.parametrize('driver', ['parquet', 'flatgeobuf'])
+def test_export_bbox(export_feed, tmp_path, driver):
+    pytest.importorskip('pyarrow')
+    dst = str(tmp_path / 'export')
+    export_gtfs(export_feed, dst, driver=driver, row_group_size=10)
+    extension = '.parquet' if driver == 'parquet' else '.fgb'
+
+    bbox = [16.25, 48.05, 16.4, 48.2]
+    gdf = read_layer(f"{dst}/stops{extension}", bbox=bbox)
+    stops = export_feed['stops']
+    mask = stops['stop_lon'].between(bbox[0], bbox[2]) \
+        & stops['stop_lat'].between(bbox[1], bbox[3])
+    assert sorted(gdf['stop_id']) == sorted(stops.loc[mask, 'stop_id'])
+
+    # Lines are read if their bounding box intersects the window
+    gdf = read_layer(
+        f"{dst}/shapes{extension}", bbox=[16.42, 48.2, 16.6, 48.4])
+    assert list(gdf['shape_id']) == ['SH2']
+
+    # Routes without stops are not exported
+    gdf = read_layer(f"{dst}/routes{extension}")
+    assert list(gdf['route_id']) == ['R1']
+    assert all(shapely.get_num_points(gdf.geometry) == 3)
+
+    if driver == 'parquet':
+        df = pd.read_parquet(f"{dst}/tables/stop_times.parquet")
+        assert len(df) == len(export_feed['stop_times'])
+
+
+def test_export_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+
+    # Fails before trying to load the (missing) feed
+    with pytest.raises(ImportError, match='gtfsutils\\[export\\]'):
+        export_gtfs(str(tmp_path / 'missing.zip'), str(tmp_path / 'export'))
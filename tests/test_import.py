@@ -0,0 +1,28 @@
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ['pandas', 'geopandas', 'shapely']
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_loaded_modules(statement):
+    code = (
+        f"import sys, json; {statement}; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} "
+        "if m in sys.modules]))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT_DIR,
+        check=True, capture_output=True, text=True).stdout
+
+    return json.loads(output)
+
+
+def test_import_is_lazy():
+    # Importing the package and the command-line tool must not load the
+    # geospatial stack, see benchmarks/bench_import.py
+    assert get_loaded_modules("import gtfsutils") == []
+    assert get_loaded_modules("import gtfsutils.__main__") == []
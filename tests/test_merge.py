@@ -0,0 +1,84 @@
+import pandas as pd
+
+from gtfsutils.merge import merge_gtfs
+
+
+def copy_feed(df_dict):
+    return {key: df.copy() for key, df in df_dict.items()}
+
+
+def test_merge_deduplicate_transfers(feed):
+    feed['transfers'] = pd.DataFrame({
+        'from_stop_id': ['S1'],
+        'to_stop_id': ['S2'],
+        'transfer_type': [2],
+        'min_transfer_time': [134]
+    })
+    other = copy_feed(feed)
+    other['transfers']['min_transfer_time'] = 132
+
+    df_dict = merge_gtfs([feed, other], deduplicate=True)
+
+    assert len(df_dict['stops']) == 2
+    assert len(df_dict['transfers']) == 1
+
+
+def test_merge_optional_shapes(feed):
+    other = copy_feed(feed)
+    feed['shapes'] = pd.DataFrame({
+        'shape_id': ['SH1', 'SH1'],
+        'shape_pt_lon': [16.37, 16.38],
+        'shape_pt_lat': [48.21, 48.22],
+        'shape_pt_sequence': [1, 2]
+    })
+    feed['trips']['shape_id'] = ['SH1']
+
+    df_dict = merge_gtfs([feed, other])
+
+    assert len(df_dict['trips']) == 2
+    assert df_dict['trips']['shape_id'].isna().sum() == 1
+
+
+def test_merge_calendar_dates_only(feed):
+    del feed['calendar']
+    feed['calendar_dates']['exception_type'] = 1
+    other = copy_feed(feed)
+    other['calendar_dates']['date'] = 20230103
+
+    df_dict = merge_gtfs([feed, other])
+
+    service_ids = df_dict['trips']['service_id'].values
+    assert service_ids[0] != service_ids[1]
+    calendar_dates = df_dict['calendar_dates'].set_index('service_id')
+    assert calendar_dates.loc[service_ids[0], 'date'] == 20230102
+    assert calendar_dates.loc[service_ids[1], 'date'] == 20230103
+
+
+def test_merge_fare_agency(feed):
+    feed['fare_attributes'] = pd.DataFrame({
+        'fare_id': ['F1'],
+        'price': [2.4],
+        'currency_type': ['EUR'],
+        'payment_method': [0],
+        'transfers': [0],
+        'agency_id': ['A']
+    })
+    other = copy_feed(feed)
+    other['agency']['agency_name'] = 'Other agency'
+
+    df_dict = merge_gtfs([feed, other], deduplicate=True)
+
+    # Each fare points to the agency of its own feed
+    assert df_dict['fare_attributes']['agency_id'].tolist() \
+        == df_dict['agency']['agency_id'].tolist()
+    assert df_dict['fare_attributes']['agency_id'].tolist() \
+        == df_dict['routes']['agency_id'].tolist()
+
+
+def test_merge_agency_without_key_columns(feed):
+    feed['agency'] = feed['agency'].drop(columns=['agency_name'])
+    other = copy_feed(feed)
+
+    df_dict = merge_gtfs([feed, other], deduplicate=True)
+
+    assert len(df_dict['agency']) == 2
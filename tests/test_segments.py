@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from gtfsutils.segments import get_segment_statistics
+
+
+@pytest.fixture
+def segment_feed(feed):
+    # Three trips over the same segment, only two have shape distances
+    feed['trips'] = pd.DataFrame({
+        'route_id': ['R1', 'R1', 'R1'],
+        'service_id': ['WD', 'WD', 'WD'],
+        'trip_id': ['T1', 'T2', 'T3']
+    })
+    feed['stop_times'] = pd.DataFrame({
+        'trip_id': ['T1', 'T1', 'T2', 'T2', 'T3', 'T3'],
+        'stop_id': ['S1', 'S2', 'S1', 'S2', 'S1', 'S2'],
+        'stop_sequence': [1, 2, 1, 2, 1, 2],
+        'arrival_time': [
+            '08:00:00', '08:01:00', '08:10:00', '08:12:00',
+            '08:20:00', '08:23:00'],
+        'departure_time': [
+            '08:00:00', '08:01:00', '08:10:00', '08:12:00',
+            '08:20:00', '08:23:00'],
+        'shape_dist_traveled': [0, 1000, 0, 1000, np.nan, np.nan]
+    })
+    return feed
+
+
+def test_segments_partial_distance(segment_feed):
+    df = get_segment_statistics(segment_feed, distance='shape_dist_traveled')
+
+    assert len(df) == 1
+    row = df.iloc[0]
+    assert row['trips'] == 3
+    assert row['mean_runtime'] == 120
+    assert row['distance'] == pytest.approx(1000)
+    # 2000 m in 180 s, the trip without distance is ignored
+    assert row['speed'] == pytest.approx(2000 / 180 * 3.6)
+
+
+def test_segments_missing_distance(segment_feed):
+    segment_feed['stop_times']['shape_dist_traveled'] = np.nan
+
+    df = get_segment_statistics(segment_feed, distance='shape_dist_traveled')
+
+    assert np.isnan(df['distance'].iloc[0])
+    assert np.isnan(df['speed'].iloc[0])
+
+
+def test_segments_chunks(feed):
+    # Random trips over a line of stops, with several routes and hours
+    rng = np.random.default_rng(0)
+    num_stops, num_trips = 8, 200
+    stop_ids = [f"S{i}" for i in range(num_stops)]
+    feed['stops'] = pd.DataFrame({
+        'stop_id': stop_ids,
+        'stop_name': stop_ids,
+        'stop_lon': 16.3 + 0.01 * np.arange(num_stops),
+        'stop_lat': 48.2
+    })
+    feed['trips'] = pd.DataFrame({
+        'route_id': rng.choice(['R1', 'R2', 'R3'], num_trips),
+        'service_id': 'WD',
+        'trip_id': [f"T{i}" for i in range(num_trips)]
+    })
+    length = rng.integers(2, num_stops + 1, num_trips)
+    trip_idx = np.repeat(np.arange(num_trips), length)
+    sequence = np.arange(len(trip_idx)) - np.repeat(
+        np.cumsum(length) - length, length)
+    first = np.cumsum(length) - length
+    steps = rng.integers(60, 300, len(trip_idx))
+    steps[first] = 0
+    elapsed = np.cumsum(steps)
+    times = rng.integers(5 * 3600, 22 * 3600, num_trips)[trip_idx] \
+        + elapsed - np.repeat(elapsed[first], length)
+    feed['stop_times'] = pd.DataFrame({
+        'trip_id': feed['trips']['trip_id'].values[trip_idx],
+        'stop_id': np.array(stop_ids)[sequence],
+        'stop_sequence': sequence,
+        'arrival_time': [
+            f"{t // 3600:02d}:{t // 60 % 60:02d}:{t % 60:02d}"
+            for t in times]
+    }).sample(frac=1, random_state=0)
+    feed['stop_times']['departure_time'] = feed['stop_times']['arrival_time']
+
+    df = get_segment_statistics(feed, chunk_size=100000)
+    df_chunked = get_segment_statistics(feed, chunk_size=1)
+
+    assert df['trips'].sum() == (length - 1).sum()
+    pd.testing.assert_frame_equal(df, df_chunked)
@@ -0,0 +1,107 @@
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from zipfile import BadZipFile
+
+import pytest
+
+from gtfsutils import save_gtfs
+from gtfsutils.serve import FeedCache, FeedHTTPServer, FeedRequestHandler
+
+
+@pytest.fixture
+def server():
+    server = FeedHTTPServer(('127.0.0.1', 0), FeedRequestHandler)
+    server.setup_feeds(max_memory=2**30, workers=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, path, data=None):
+    host, port = server.server_address
+    req = urllib.request.Request(f"http://{host}:{port}/{path}", data=data)
+    try:
+        with urllib.request.urlopen(req) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_serve_invalid_body(server):
+    status, _ = request(server, 'cache', data=b'{invalid')
+    assert status == 400
+
+    status, _ = request(server, 'cache', data=b'[]')
+    assert status == 400
+
+    status, result = request(server, 'cache', data=b'{}')
+    assert status == 200
+    assert result['feeds'] == []
+
+
+def test_serve_address_in_use(server):
+    with pytest.raises(OSError):
+        FeedHTTPServer(server.server_address, FeedRequestHandler)
+
+
+def test_cache_reload(feed, tmp_path):
+    filepath = str(tmp_path / 'feed.gtfs.zip')
+    save_gtfs(feed, filepath)
+    cache = FeedCache(max_memory=2**30)
+
+    df_dict = cache.get(filepath)
+    assert cache.get(filepath) is df_dict
+    memory_usage = cache.memory_usage
+
+    # Modified feeds replace the cached version
+    mtime = os.path.getmtime(filepath)
+    os.utime(filepath, (mtime + 10, mtime + 10))
+    assert cache.get(filepath) is not df_dict
+    assert len(cache.info()['feeds']) == 1
+    assert cache.memory_usage == memory_usage
+
+
+def test_cache_load_error(tmp_path):
+    filepath = tmp_path / 'invalid.gtfs.zip'
+    filepath.write_text('invalid')
+    cache = FeedCache(max_memory=2**30)
+
+    with pytest.raises(BadZipFile):
+        cache.get(str(filepath))
+    assert cache._load_locks == {}
+
+
+def test_serve_nearest(server, feed, tmp_path):
+    filepath = str(tmp_path / 'feed.gtfs.zip')
+    save_gtfs(feed, filepath)
+    query = f"nearest?src={filepath}&lon=16.38&lat=48.22"
+
+    status, result = request(server, query + "&k=5")
+    assert status == 200
+    assert [item['stop_id'] for item in result] == ['S2', 'S1']
+
+    status, _ = request(server, query + "&k=0")
+    assert status == 400
+
+
+def test_serve_filter_existing(server, feed, tmp_path):
+    src = str(tmp_path / 'feed.gtfs.zip')
+    dst = str(tmp_path / 'filtered.gtfs.zip')
+    save_gtfs(feed, src)
+    params = {'src': src, 'dst': dst, 'bounds': [16.0, 48.0, 17.0, 49.0]}
+
+    status, result = request(server, 'filter', json.dumps(params).encode())
+    assert status == 200
+    assert result['files']['stops'] == 2
+
+    status, _ = request(server, 'filter', json.dumps(params).encode())
+    assert status == 409
+
+    params['overwrite'] = True
+    status, _ = request(server, 'filter', json.dumps(params).encode())
+    assert status == 200
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from gtfsutils.stats import get_service_statistics, get_trips_per_hour
+
+DATE = '20230104'
+
+
+@pytest.fixture
+def stats_feed(feed):
+    # Two routes with irregular departures, R2 has trips on two directions
+    rng = np.random.default_rng(0)
+    num_trips = 60
+    route_ids = rng.choice(['R1', 'R2'], num_trips)
+    direction_ids = np.where(
+        route_ids == 'R1', 0, rng.integers(0, 2, num_trips))
+    departures = np.sort(rng.integers(5 * 3600, 23 * 3600, num_trips))
+    trip_ids = [f"T{i}" for i in range(num_trips)]
+
+    feed['routes'] = pd.DataFrame({
+        'route_id': ['R1', 'R2'],
+        'agency_id': ['A', 'A'],
+        'route_type': [3, 3]
+    })
+    # Every tenth trip runs on weekends only
+    feed['trips'] = pd.DataFrame({
+        'route_id': route_ids,
+        'service_id': np.where(np.arange(num_trips) % 10 == 0, 'WE', 'WD'),
+        'trip_id': trip_ids,
+        'direction_id': direction_ids
+    })
+    feed['stop_times'] = pd.DataFrame({
+        'trip_id': np.repeat(trip_ids, 2),
+        'stop_id': np.tile(['S1', 'S2'], num_trips),
+        'stop_sequence': np.tile([1, 2], num_trips),
+        'arrival_time': [
+            f"{t // 3600:02d}:{t // 60 % 60:02d}:{t % 60:02d}"
+            for t in np.repeat(departures, 2) + np.tile([0, 300], num_trips)
+        ]
+    })
+    feed['stop_times']['departure_time'] = feed['stop_times']['arrival_time']
+    # Reverse the rows, so the first stop of a trip is not the first row
+    feed['stop_times'] = feed['stop_times'].iloc[::-1]
+    return feed
+
+
+def naive_departures(feed):
+    # First departure of each trip running on DATE, with plain groupby
+    stop_times = feed['stop_times'].assign(
+        departure=pd.to_timedelta(feed['stop_times']['departure_time'])
+        .dt.total_seconds().astype(int))
+    departures = stop_times.groupby('trip_id')['departure'].min()
+    trips = feed['trips'][feed['trips']['service_id'] == 'WD']
+
+    return trips.assign(departure=departures.loc[trips['trip_id']].values)
+
+
+def test_trips_per_hour(stats_feed):
+    feed = stats_feed
+    df = get_trips_per_hour(feed, DATE)
+
+    df_naive = naive_departures(feed)
+    df_naive['hour'] = df_naive['departure'] // 3600
+    df_naive = df_naive.groupby(['route_id', 'direction_id', 'hour']) \
+        .size().rename('trips').reset_index()
+
+    pd.testing.assert_frame_equal(
+        df.reset_index(drop=True), df_naive, check_dtype=False)
+
+
+def test_service_statistics(stats_feed):
+    feed = stats_feed
+    df = get_service_statistics(feed, DATE) \
+        .set_index(['route_id', 'direction_id'])
+    assert df['trips'].sum() == 54
+
+    df_naive = naive_departures(feed)
+    for key, group in df_naive.groupby(['route_id', 'direction_id']):
+        times = np.sort(group['departure'].values)
+        headways = np.diff(times)
+        hours = pd.Series(times // 3600).value_counts()
+        peak_trips = hours.max()
+        row = df.loc[key]
+
+        assert row['trips'] == len(times)
+        assert row['first_departure'] == times[0]
+        assert row['last_departure'] == times[-1]
+        if len(times) > 1:
+            assert row['min_headway'] == headways.min()
+            assert row['max_headway'] == headways.max()
+            assert row['mean_headway'] == pytest.approx(headways.mean())
+        assert row['peak_trips'] == peak_trips
+        assert row['peak_hour'] == hours[hours == peak_trips].index.min()
+
+
+def test_service_statistics_frequencies(feed):
+    # One template trip, every 10 minutes from 08:00 to 09:00 and every
+    # 20 minutes from 09:00 to 10:00
+    feed['frequencies'] = pd.DataFrame({
+        'trip_id': ['T1', 'T1'],
+        'start_time': ['08:00:00', '09:00:00'],
+        'end_time': ['09:00:00', '10:00:00'],
+        'headway_secs': [600, 1200]
+    })
+    feed['stop_times']['arrival_time'] = ['06:30:00', '06:35:00']
+    feed['stop_times']['departure_time'] = ['06:30:00', '06:35:00']
+
+    df = get_service_statistics(feed, DATE)
+    row = df.iloc[0]
+    assert row['trips'] == 9
+    assert row['first_departure'] == 8 * 3600
+    assert row['last_departure'] == 9 * 3600 + 40 * 60
+    assert row['peak_hour'] == 8
+    assert row['peak_trips'] == 6
+
+    df = get_trips_per_hour(feed, DATE, by=['route_id', 'stop_id'])
+    df = df.set_index(['stop_id', 'hour'])['trips']
+    assert df['S1', 8] == 6
+    assert df['S2', 9] == 3
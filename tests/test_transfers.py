@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from gtfsutils.spatial import haversine_distance
+from gtfsutils.transfers import add_transfers, generate_transfers
+
+
+@pytest.fixture
+def transfer_feed(feed):
+    # S1 and S2 are 100 m apart, S3 is 1 km away, P1 and P2 are 500 m
+    # apart platforms of station ST
+    feed['stops'] = pd.DataFrame({
+        'stop_id': ['S1', 'S2', 'S3', 'ST', 'P1', 'P2'],
+        'stop_name': ['S1', 'S2', 'S3', 'Station', 'P1', 'P2'],
+        'stop_lon': [16.37, 16.371348, 16.38348, 16.40, 16.40, 16.40674],
+        'stop_lat': [48.21, 48.21, 48.21, 48.23, 48.23, 48.23],
+        'location_type': [0, 0, 0, 1, 0, 0],
+        'parent_station': [None, None, None, None, 'ST', 'ST']
+    })
+    return feed
+
+
+def get_pairs(df):
+    return set(zip(df['from_stop_id'], df['to_stop_id']))
+
+
+def test_generate_transfers(transfer_feed):
+    df = generate_transfers(
+        transfer_feed, max_distance=300, walking_speed=1.0,
+        detour_factor=1.5)
+
+    assert get_pairs(df) == {
+        ('S1', 'S2'), ('S2', 'S1'), ('P1', 'P2'), ('P2', 'P1')
+    }
+    assert (df['transfer_type'] == 2).all()
+
+    # Walking time with detour over the actual distance
+    stops = transfer_feed['stops'].set_index('stop_id')
+    distance = haversine_distance(
+        stops.loc['S1', 'stop_lon'], stops.loc['S1', 'stop_lat'],
+        stops.loc['S2', 'stop_lon'], stops.loc['S2', 'stop_lat'])
+    duration = df.set_index(['from_stop_id', 'to_stop_id']) \
+        .loc[('S1', 'S2'), 'min_transfer_time']
+    assert duration == pytest.approx(distance * 1.5, abs=1)
+
+
+def test_generate_transfers_radius(transfer_feed):
+    df = generate_transfers(transfer_feed, max_distance=1100)
+
+    assert ('S1', 'S3') in get_pairs(df)
+    assert ('S2', 'S3') in get_pairs(df)
+    assert 'ST' not in set(df['from_stop_id'])
+
+
+def test_add_transfers_existing(transfer_feed):
+    transfer_feed['transfers'] = pd.DataFrame({
+        'from_stop_id': ['S1'],
+        'to_stop_id': ['S2'],
+        'transfer_type': [2],
+        'min_transfer_time': [999]
+    })
+
+    add_transfers(transfer_feed, max_distance=300)
+
+    df = transfer_feed['transfers']
+    assert len(df) == 4
+    df = df.set_index(['from_stop_id', 'to_stop_id'])
+    assert df.loc[('S1', 'S2'), 'min_transfer_time'] == 999
+    assert df.loc[('S2', 'S1'), 'min_transfer_time'] < 999
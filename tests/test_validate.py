@@ -0,0 +1,42 @@
+import pandas as pd
+
+from gtfsutils.validate import validate_gtfs
+
+
+def get_count(report, check, table):
+    return sum(
+        result['count'] for result in report['checks']
+        if result['check'] == check and result['table'] == table)
+
+
+def test_validate_valid_feed(feed):
+    report = validate_gtfs(feed)
+
+    assert report['valid']
+    assert report['num_errors'] == 0
+
+
+def test_validate_duplicate_service_id(feed):
+    feed['calendar'] = pd.concat(
+        [feed['calendar'], feed['calendar']], ignore_index=True)
+
+    report = validate_gtfs(feed)
+
+    assert not report['valid']
+    assert get_count(report, 'primary_key', 'calendar') == 2
+
+
+def test_validate_malformed_time(feed):
+    feed['stop_times'] = pd.DataFrame({
+        'trip_id': ['T1', 'T1', 'T1'],
+        'stop_id': ['S1', 'S2', 'S1'],
+        'stop_sequence': [1, 2, 3],
+        'arrival_time': ['09:00:00', '08:05:00', '1:2:3:4'],
+        'departure_time': ['09:00:00', '08:05:00', None]
+    })
+
+    report = validate_gtfs(feed)
+
+    assert not report['valid']
+    assert get_count(report, 'format', 'stop_times') == 1
+    assert get_count(report, 'increasing', 'stop_times') == 1